@@ -1,39 +1,14 @@
 
-import os
+import re
 import logging
-import openai
-import google.generativeai as genai
-
-def summarize_group(source_name, items, config):
-    """
-    Summarizes a list of items from a specific source into one comprehensive report.
-    """
-    if not items:
-        return None
-
-    ai_config = config.get('ai', {})
-    if not ai_config.get('enabled', False):
-        return None
-        
-    provider = ai_config.get('provider', 'openai').lower()
-    api_key = os.environ.get('AI_API_KEY') 
-    if not api_key:
-        api_key = ai_config.get('api_key')
-    if not api_key:
-        return None
-
-    # Prepare input text from items
-    items_text = ""
-    for i, item in enumerate(items, 1):
-        items_text += f"Item {i}:\nTitle: {item.get('title')}\nDescription: {item.get('description', '')}\n\n"
-
-    prompt = f"""
-    You are a professional Personal Assistant briefing your boss.
-    
-    Source: {source_name}
-    Received Data:
-    {items_text}
+from concurrent.futures import ThreadPoolExecutor
+from ai_providers import get_backend, provider_name, resolve_model
+from rate_limit import get_limiter, is_rate_limit_error, retry_after
+from llm_cache import LLMCache, cache_key
+from prompt_builder import estimate_tokens, fit_groups, report_prompt
 
+# Shared by the single-source and the batched prompt
+TASK_INSTRUCTIONS = """
     **Task**:
     1. **Strictly Filter**: Identify and **IGNORE** items that are:
        - **User Questions**: Asking for help, debugging advice (e.g. "Help me", "Why is this error?").
@@ -73,48 +48,268 @@ def summarize_group(source_name, items, config):
 
        - If ALL items are filtered out, still output the "Filtered Log" section, but put "Nothing significant to report" in Briefing.
 
+"""
+
+BATCH_OUTPUT_INSTRUCTIONS = """
+    **Batch Output (MANDATORY)**:
+       - The data above comes from {count} different sources. Apply the Task to **EACH source separately**; never mix items from different sources.
+       - For every source, in order, first output the exact marker line `<<<SOURCE n>>>` (n = the source number above), then that source's report in the output format described above.
+       - Output a section for **every** source, even if all of its items are filtered out.
+"""
+
+# Defaults for the batching planner (overridable under config['ai'])
+DEFAULT_BATCH_TOKEN_BUDGET = 6000
+DEFAULT_BATCH_MAX_SOURCES = 8
+
+MAX_ATTEMPTS = 3 # per call, retried only on 429
+
+# Bump whenever TASK_INSTRUCTIONS or the prompt layout changes, so cached summaries are not reused
+PROMPT_VERSION = 2
+
+# Parallel calls in flight per provider (override with config['ai']['concurrency'])
+PROVIDER_CONCURRENCY = {'groq': 4, 'gemini': 2, 'openai': 8, 'mock': 8}
+
+SOURCE_MARKER = re.compile(r'<<<\s*SOURCE\s+(\d+)\s*>>>')
+# Every complete per-source report ends with this section
+SECTION_END = '## Filtered Log'
+
+def format_items(items):
+    items_text = ""
+    for i, item in enumerate(items, 1):
+        items_text += f"Item {i}:\nTitle: {item.get('title')}\nDescription: {item.get('description', '')}\n\n"
+    return items_text
+
+def build_prompt(source_name, items):
+    return f"""
+    You are a professional Personal Assistant briefing your boss.
+    
+    Source: {source_name}
+    Received Data:
+    {format_items(items)}
+{TASK_INSTRUCTIONS}
+    **Output**:
+    """
+
+def build_batch_prompt(batch):
+    """
+    One prompt for several (source_name, items) groups, answered in <<<SOURCE n>>> sections.
+    """
+    sources_text = ""
+    for n, (source_name, items) in enumerate(batch, 1):
+        sources_text += f"=== SOURCE {n}: {source_name} ===\n{format_items(items)}"
+
+    return f"""
+    You are a professional Personal Assistant briefing your boss.
+    
+    Received Data ({len(batch)} sources):
+    {sources_text}
+{TASK_INSTRUCTIONS}
+{BATCH_OUTPUT_INSTRUCTIONS.format(count=len(batch))}
     **Output**:
     """
 
-    try:
-        if provider == 'openai':
-            client = openai.OpenAI(api_key=api_key)
-            response = client.chat.completions.create(
-                model="gpt-4o-mini", 
-                messages=[
-                    {"role": "system", "content": "You are a professional news editor."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=800 
-            )
-            result = response.choices[0].message.content.strip()
-            
-        elif provider == 'gemini':
-            genai.configure(api_key=api_key)
-            # Use 'gemini-2.5-flash'
-            model = genai.GenerativeModel('gemini-2.5-flash')
-            response = model.generate_content(prompt)
-            result = response.text.strip()
-
-        elif provider == 'groq':
-            from groq import Groq
-            client = Groq(api_key=api_key)
-            completion = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[
-                    {"role": "system", "content": "You are a professional news editor. Output brief, structured Traditional Chinese."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=1000,
-            )
-            result = completion.choices[0].message.content.strip()
-            
-        else:
-            return None
-            
-        return result
-            
-    except Exception as e:
-        logging.error(f"AI Group Summarization failed: {e}")
+def split_batch_response(text, count, truncated=False):
+    """
+    Splits a batched completion back into per-source summaries.
+    Returns a list of length `count`; sources without a complete section
+    (no Filtered Log, or the last one of a completion cut off at the token
+    limit) are None.
+    """
+    results = [None] * count
+    matches = list(SOURCE_MARKER.finditer(text or ''))
+    for i, match in enumerate(matches):
+        if truncated and i + 1 == len(matches):
+            break
+        n = int(match.group(1))
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        section = text[match.end():end].strip()
+        if 1 <= n <= count and SECTION_END in section and results[n - 1] is None:
+            results[n - 1] = section
+    return results
+
+def plan_batches(grouped_data, config):
+    """
+    Packs source groups, in order, into batches whose estimated input fits the
+    token budget. Groups that are large on their own get a batch to themselves.
+    Returns a list of batches, each a list of (source_name, items).
+    """
+    ai_config = config.get('ai', {})
+    budget = ai_config.get('batch_token_budget', DEFAULT_BATCH_TOKEN_BUDGET)
+    max_sources = ai_config.get('batch_max_sources', DEFAULT_BATCH_MAX_SOURCES)
+
+    batches = []
+    current = []
+    current_tokens = 0
+    for source, data in grouped_data.items():
+        items = data['items']
+        if not items:
+            continue
+        cost = estimate_tokens(source) + estimate_tokens(format_items(items)) + 10
+        if cost >= budget or max_sources <= 1:
+            batches.append([(source, items)])
+            continue
+        if current and (current_tokens + cost > budget or len(current) >= max_sources):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append((source, items))
+        current_tokens += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def summarize_batch(batch, config):
+    """
+    Summarizes a batch from plan_batches() with a single call.
+    Returns {source_name: summary}. Sources missing from the batched answer
+    are retried on their own, and so is every source if the batched call
+    fails.
+    """
+    if len(batch) == 1:
+        source_name, items = batch[0]
+        return {source_name: summarize_group(source_name, items, config)}
+
+    ai_config = config.get('ai', {})
+    if not ai_config.get('enabled', False):
+        return {source_name: None for source_name, _ in batch}
+    backend = get_backend(config)
+    if backend is None:
+        return {source_name: None for source_name, _ in batch}
+
+    # Each source gets the output a single-source call would get
+    output_tokens = ai_config.get('output_tokens_per_source', backend.max_tokens)
+    result, truncated = complete(build_batch_prompt(batch), config, max_tokens=output_tokens * len(batch))
+    if result is None:
+        logging.warning(f"Batched call for {len(batch)} sources failed, summarizing them separately")
+    elif truncated:
+        logging.warning(f"Batched answer for {len(batch)} sources hit the output token limit")
+
+    summaries = {}
+    sections = split_batch_response(result, len(batch), truncated)
+    for (source_name, items), section in zip(batch, sections):
+        if section is None:
+            if result is not None:
+                logging.warning(f"Batched answer has no complete section for {source_name}, summarizing it separately")
+            section = summarize_group(source_name, items, config)
+        summaries[source_name] = section
+    return summaries
+
+def summarize_all(grouped_data, config):
+    """
+    Summarizes every group in `grouped_data` in place, dispatching the
+    batches from plan_batches() in parallel up to the provider's concurrency
+    cap. A failing batch only leaves its own sources without a summary.
+    """
+    ai_config = config.get('ai', {})
+    provider = provider_name(config)
+    workers = ai_config.get('concurrency', PROVIDER_CONCURRENCY.get(provider, 2))
+    model = resolve_model(config)
+
+    # Cached summaries (e.g. on a re-run after a failed send) need no API call
+    cache = LLMCache.from_config(config)
+    keys = {}
+    duplicates = {} # source -> other sources in this run with the same items
+    first_with_key = {}
+    pending = {}
+    for source, data in grouped_data.items():
+        if not data['items']:
+            continue
+        if cache:
+            key = keys[source] = cache_key(provider, model, PROMPT_VERSION, data['items'])
+            if key in first_with_key:
+                duplicates.setdefault(first_with_key[key], []).append(source)
+                continue
+            first_with_key[key] = source
+            summary = cache.get(key)
+            if summary:
+                data['summary'] = summary
+                continue
+        pending[source] = data
+    if cache and keys:
+        stats = cache.stats()
+        logging.info(f"LLM cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%})")
+
+    # Descriptions are trimmed to ai.prompt_token_budget before batching
+    batches = plan_batches(fit_groups(pending, config), config)
+    logging.info(f"AI Summarization enabled. {len(grouped_data)} sources in {len(batches)} calls, {workers} in parallel...")
+
+    def run(batch):
+        names = ", ".join(source for source, _ in batch)
+        logging.info(f"Summarizing {len(batch)} source(s): {names}")
+        return summarize_batch(batch, config)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(run, batch) for batch in batches]
+        # Collected in submission order so the report is deterministic
+        for batch, future in zip(batches, futures):
+            try:
+                for source, summary in future.result().items():
+                    if summary:
+                        grouped_data[source]['summary'] = summary
+                        if cache:
+                            cache.put(keys[source], summary)
+            except Exception as e:
+                names = ", ".join(source for source, _ in batch)
+                logging.error(f"Error summarizing {names}: {e}")
+
+    for source, others in duplicates.items():
+        for other in others:
+            grouped_data[other]['summary'] = grouped_data[source]['summary']
+
+    if cache:
+        cache.evict()
+
+def summarize_group(source_name, items, config):
+    """
+    Summarizes a list of items from a specific source into one comprehensive report.
+    """
+    if not items:
         return None
+    return call_provider(build_prompt(source_name, items), config)
+
+def call_provider(prompt, config, max_tokens=None):
+    """
+    Sends `prompt` to the configured AI backend and returns the text, or None.
+    `max_tokens` raises the backend's output limit (used for batches).
+    With ai.stream enabled the completion is received as a stream and
+    joined; that only keeps long completions from hitting an idle read
+    timeout, the text is returned once the stream ends.
+    """
+    result, truncated = complete(prompt, config, max_tokens)
+    if truncated:
+        logging.warning("AI answer was cut off at the output token limit (raise ai.max_tokens)")
+    return result
+
+def complete(prompt, config, max_tokens=None):
+    """
+    Like call_provider() but returns (text or None, truncated), where
+    `truncated` tells whether the answer stopped at the output token limit.
+    """
+    ai_config = config.get('ai', {})
+    if not ai_config.get('enabled', False):
+        return None, False
+
+    backend = get_backend(config)
+    if backend is None:
+        return None, False
+
+    limiter = get_limiter(backend.name, config)
+    tokens = report_prompt(prompt) + (max_tokens or backend.max_tokens)
+
+    for attempt in range(MAX_ATTEMPTS):
+        limiter.acquire(tokens)
+        try:
+            if ai_config.get('stream', False):
+                chunks, headers = backend.stream(prompt, max_tokens)
+                result = ''.join(chunks).strip()
+                truncated = chunks.truncated
+            else:
+                result, headers, truncated = backend.complete(prompt, max_tokens)
+            limiter.update_from_headers(headers)
+            return result, truncated
+        except Exception as e:
+            if is_rate_limit_error(e) and attempt + 1 < MAX_ATTEMPTS:
+                limiter.backoff(retry_after(e))
+                continue
+            logging.error(f"AI Group Summarization failed: {e}")
+            return None, False
@@ -0,0 +1,253 @@
+import logging
+import os
+import re
+import threading
+import time
+
+# name -> Backend subclass, filled by @register_backend
+BACKENDS = {}
+
+def register_backend(name):
+    def decorator(cls):
+        cls.name = name
+        BACKENDS[name] = cls
+        return cls
+    return decorator
+
+class ChunkStream:
+    """
+    Iterates over the text chunks of a streamed completion. `truncated` is
+    set once the stream is exhausted, from (text, finished at length limit)
+    pairs of the underlying iterator.
+    """
+    def __init__(self, pairs):
+        self._pairs = pairs
+        self.truncated = False
+
+    def __iter__(self):
+        for text, truncated in self._pairs:
+            if truncated:
+                self.truncated = True
+            if text:
+                yield text
+
+class Backend:
+    """
+    One AI provider. The SDK client is created once in __init__ and reused
+    for every call in the run.
+
+    complete() returns (text, rate-limit headers or None, truncated);
+    stream() returns (ChunkStream, headers or None). `truncated` is True
+    when the completion stopped at the output token limit. Model,
+    max_tokens and temperature come from config['ai'] with per-backend
+    defaults.
+    """
+    name = None
+    default_model = None
+    default_max_tokens = 1000
+    default_temperature = None
+    requires_key = True
+    sdk_module = None # imported when the backend is created, never at startup
+    system_prompt = "You are a professional news editor."
+
+    def __init__(self, api_key=None, model=None, max_tokens=None, temperature=None):
+        self.api_key = api_key
+        self.model = model or self.default_model
+        self.configured_max_tokens = max_tokens
+        self.max_tokens = max_tokens or self.default_max_tokens
+        self.temperature = self.default_temperature if temperature is None else temperature
+
+    @classmethod
+    def from_config(cls, ai_config, api_key):
+        return cls(
+            api_key=api_key,
+            model=ai_config.get('model'),
+            max_tokens=ai_config.get('max_tokens'),
+            temperature=ai_config.get('temperature')
+        )
+
+    def _max_tokens(self, max_tokens):
+        return max(self.max_tokens, max_tokens or 0)
+
+    def complete(self, prompt, max_tokens=None):
+        raise NotImplementedError
+
+    def stream(self, prompt, max_tokens=None):
+        """
+        Backends without streaming return the whole completion as one chunk.
+        """
+        text, headers, truncated = self.complete(prompt, max_tokens)
+        return ChunkStream(iter([(text, truncated)])), headers
+
+@register_backend('openai')
+class OpenAIBackend(Backend):
+    default_model = 'gpt-4o-mini'
+    default_max_tokens = 800
+    sdk_module = 'openai'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.client = self._make_client()
+
+    def _make_client(self):
+        import openai
+        return openai.OpenAI(api_key=self.api_key)
+
+    def _create(self, prompt, max_tokens, stream=False):
+        kwargs = {
+            'model': self.model,
+            'messages': [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            'max_tokens': self._max_tokens(max_tokens),
+            'stream': stream
+        }
+        if self.temperature is not None:
+            kwargs['temperature'] = self.temperature
+        # with_raw_response exposes the x-ratelimit-* headers
+        return self.client.chat.completions.with_raw_response.create(**kwargs)
+
+    def complete(self, prompt, max_tokens=None):
+        raw = self._create(prompt, max_tokens)
+        response = raw.parse()
+        choice = response.choices[0]
+        return (choice.message.content or '').strip(), raw.headers, choice.finish_reason == 'length'
+
+    def stream(self, prompt, max_tokens=None):
+        raw = self._create(prompt, max_tokens, stream=True)
+        pairs = (
+            (chunk.choices[0].delta.content, chunk.choices[0].finish_reason == 'length')
+            for chunk in raw.parse()
+            if chunk.choices
+        )
+        return ChunkStream(pairs), raw.headers
+
+@register_backend('groq')
+class GroqBackend(OpenAIBackend):
+    # Groq's SDK mirrors the OpenAI one
+    default_model = 'llama-3.3-70b-versatile'
+    default_max_tokens = 1000
+    default_temperature = 0.3
+    sdk_module = 'groq'
+    system_prompt = "You are a professional news editor. Output brief, structured Traditional Chinese."
+
+    def _make_client(self):
+        from groq import Groq
+        return Groq(api_key=self.api_key)
+
+@register_backend('gemini')
+class GeminiBackend(Backend):
+    default_model = 'gemini-2.5-flash'
+    sdk_module = 'google.generativeai'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        import google.generativeai as genai
+        genai.configure(api_key=self.api_key)
+        self.client = genai.GenerativeModel(self.model)
+
+    def _generation_config(self, max_tokens):
+        generation_config = {}
+        # Gemini has no output cap by default, and gemini-2.5 spends part of
+        # any cap on thinking; only set one when ai.max_tokens asks for it
+        if self.configured_max_tokens:
+            generation_config['max_output_tokens'] = max(self.configured_max_tokens, max_tokens or 0)
+        if self.temperature is not None:
+            generation_config['temperature'] = self.temperature
+        return generation_config or None
+
+    @staticmethod
+    def _parse(response):
+        """
+        (text, truncated) of a response or stream chunk. `response.text`
+        raises when a response has no text parts, e.g. when the output cap
+        was used up by thinking tokens.
+        """
+        candidates = response.candidates or []
+        reason = getattr(candidates[0], 'finish_reason', None) if candidates else None
+        truncated = getattr(reason, 'name', reason) in ('MAX_TOKENS', 2)
+        try:
+            return response.text, truncated
+        except ValueError:
+            return '', truncated
+
+    def complete(self, prompt, max_tokens=None):
+        response = self.client.generate_content(prompt, generation_config=self._generation_config(max_tokens))
+        text, truncated = self._parse(response)
+        # The Gemini SDK doesn't expose rate-limit headers; 429s surface as ResourceExhausted
+        return text.strip(), None, truncated
+
+    def stream(self, prompt, max_tokens=None):
+        response = self.client.generate_content(prompt, generation_config=self._generation_config(max_tokens), stream=True)
+        return ChunkStream(self._parse(chunk) for chunk in response), None
+
+@register_backend('mock')
+class MockBackend(Backend):
+    """
+    Offline backend for tests and benchmarks: no network, deterministic output
+    in the expected report format (one <<<SOURCE n>>> section per source for
+    batched prompts). ai.mock_latency adds a fixed delay per call.
+    """
+    default_model = 'mock'
+    requires_key = False
+
+    @classmethod
+    def from_config(cls, ai_config, api_key):
+        backend = super().from_config(ai_config, api_key)
+        backend.latency = ai_config.get('mock_latency', 0.0)
+        return backend
+
+    def _answer(self, prompt):
+        sources = re.findall(r'=== SOURCE (\d+): (.+?) ===', prompt)
+        if not sources:
+            match = re.search(r'Source: (.+)', prompt)
+            return self._section(match.group(1).strip() if match else 'Unknown', prompt)
+        return "\n\n".join(f"<<<SOURCE {n}>>>\n{self._section(name, prompt)}" for n, name in sources)
+
+    def _section(self, source_name, prompt):
+        return f"報告老闆，(mock) {source_name} 共有新資訊，詳見下方連結。\n\n## Filtered Log\n"
+
+    def complete(self, prompt, max_tokens=None):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._answer(prompt), None, False
+
+    def stream(self, prompt, max_tokens=None):
+        text, headers, _ = self.complete(prompt, max_tokens)
+        return ChunkStream((text[i:i + 40], False) for i in range(0, len(text), 40)), headers
+
+def provider_name(config):
+    return config.get('ai', {}).get('provider', 'openai').lower()
+
+def resolve_model(config):
+    backend_cls = BACKENDS.get(provider_name(config))
+    return config.get('ai', {}).get('model') or (backend_cls.default_model if backend_cls else None)
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+def get_backend(config):
+    """
+    Returns the backend for config['ai'], created once per run and shared
+    across groups and threads. Returns None if the provider is unknown or
+    needs an API key that isn't set (AI_API_KEY env var or ai.api_key).
+    """
+    ai_config = config.get('ai', {})
+    provider = provider_name(config)
+    backend_cls = BACKENDS.get(provider)
+    if backend_cls is None:
+        logging.error(f"Unknown AI provider: {provider}")
+        return None
+
+    api_key = os.environ.get('AI_API_KEY') or ai_config.get('api_key')
+    if backend_cls.requires_key and not api_key:
+        return None
+
+    cache_key = (provider, resolve_model(config), api_key)
+    with _backends_lock:
+        if cache_key not in _backends:
+            backend = backend_cls.from_config(ai_config, api_key)
+            _backends[cache_key] = backend
+            logging.info(f"AI backend ready: {provider} ({backend.model})")
+        return _backends[cache_key]
@@ -0,0 +1,303 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import metrics
+from neardup import NearDupIndex, simhash, normalize_title, url_hash, DEFAULT_MAX_DISTANCE, DEFAULT_URL_MAX_DISTANCE
+
+# Query parameters that change per visit/session and must not affect identity
+TRACKING_PARAMS = ('fbclid', 'gclid', '__cft__', '__tn__', '__xts__', 'ref', 'refid')
+
+def normalize_text(text):
+    return ' '.join(str(text or '').split()).lower()
+
+def normalize_url(url):
+    """
+    Lowercases scheme/host, drops fragments, trailing slashes and tracking parameters.
+    """
+    url = (url or '').strip()
+    if not url:
+        return ''
+    parts = urlsplit(url)
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith('utm_') and k.lower() not in TRACKING_PARAMS
+    ]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ''))
+
+def _hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def item_key(item):
+    """
+    Stable content hash of an item: source + normalized URL + normalized title.
+    """
+    url = item.get('link') or item.get('url') or ''
+    raw = f"{normalize_text(item.get('source'))}|{normalize_url(url)}|{normalize_text(item.get('title'))}"
+    return _hash(raw)
+
+def legacy_key(item):
+    """
+    Hash of the old history.json id (f"{date}_{title}") so migrated entries still match.
+    """
+    return _hash(f"legacy|{item.get('date')}_{item.get('title')}")
+
+def fingerprint(item):
+    """
+    Near-duplicate fingerprint of an item: (title SimHash, URL hash or None).
+    The URL only counts when the scraper marked it as the item's own page
+    (`permalink`); listing or fallback URLs are shared by unrelated items.
+    """
+    sh = simhash(normalize_title(item.get('title')))
+    if not item.get('permalink'):
+        return sh, None
+    return sh, url_hash(normalize_url(item.get('link') or item.get('url')))
+
+DAY = 24 * 60 * 60
+
+class RetentionPolicy:
+    """
+    How long entries of one source are kept: ttl_days and/or max_entries (None = unlimited).
+    """
+    def __init__(self, ttl_days=None, max_entries=None):
+        self.ttl_days = ttl_days
+        self.max_entries = max_entries
+
+    def expired(self, record, now):
+        return self.ttl_days is not None and now - record.get('seen', now) > self.ttl_days * DAY
+
+class SeenStore:
+    """
+    Persistent set of already-reported items.
+
+    Items are indexed by item_key() in a dict, so lookups are O(1) regardless
+    of history size. On disk it is a JSON-lines file whose first line holds
+    metadata (last compaction time). save() appends only the entries added
+    during the run; every `compact_every_days` the file is rewritten
+    atomically with expired entries dropped and per-source caps applied.
+    The legacy history.json (a list of "date_title" strings and item dicts)
+    is migrated the first time the store is loaded.
+
+    Per-source policies are matched by source-name prefix, so a policy for
+    "Personal Feed" covers every "Personal Feed (author)" source.
+
+    With a NearDupIndex, is_new() also rejects items that are near-duplicates
+    of a retained entry or of an item added earlier in the run, whatever
+    their source. Records keep their title SimHash ('sh') and permalink hash
+    ('p') so the index is rebuilt on load without rehashing. ('u' hashes of
+    older records may come from listing URLs and are ignored.)
+    """
+    def __init__(self, path='history.jsonl', legacy_path='history.json',
+                 default_policy=None, source_policies=None, compact_every_days=7,
+                 near_dup=None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.default_policy = default_policy or RetentionPolicy()
+        self.source_policies = source_policies or {}
+        self.compact_every_days = compact_every_days
+        self.near_dup = near_dup
+        self._records = {}
+        self._pending = []
+        self._compacted_at = 0
+
+    @classmethod
+    def from_config(cls, config):
+        history_config = config.get('history', {})
+        source_policies = {
+            prefix: RetentionPolicy(policy.get('ttl_days'), policy.get('max_entries'))
+            for prefix, policy in (history_config.get('sources') or {}).items()
+        }
+        near_dup = None
+        near_dup_config = history_config.get('near_duplicates') or {}
+        if near_dup_config.get('enabled', True):
+            near_dup = NearDupIndex(
+                max_distance=near_dup_config.get('max_distance', DEFAULT_MAX_DISTANCE),
+                url_max_distance=near_dup_config.get('url_max_distance', DEFAULT_URL_MAX_DISTANCE)
+            )
+        return cls(
+            path=history_config.get('path', 'history.jsonl'),
+            legacy_path=history_config.get('legacy_path', 'history.json'),
+            default_policy=RetentionPolicy(history_config.get('ttl_days'), history_config.get('max_entries')),
+            source_policies=source_policies,
+            compact_every_days=history_config.get('compact_every_days', 7),
+            near_dup=near_dup
+        )
+
+    def __len__(self):
+        return len(self._records)
+
+    def policy_for(self, source):
+        best = None
+        for prefix in self.source_policies:
+            if (source or '').startswith(prefix) and (best is None or len(prefix) > len(best)):
+                best = prefix
+        return self.source_policies[best] if best is not None else self.default_policy
+
+    def load(self):
+        self._records = {}
+        self._pending = []
+        self._compacted_at = 0
+        now = time.time()
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                        if 'meta' in record:
+                            self._compacted_at = record['meta'].get('compacted', 0)
+                            continue
+                        # Expired entries are ignored now and dropped at the next compaction
+                        if not self.policy_for(record.get('source')).expired(record, now):
+                            self._records.setdefault(record['id'], record)
+                    except (ValueError, KeyError):
+                        logging.warning(f"Skipping corrupt history line: {line[:80]}")
+        elif self.legacy_path and os.path.exists(self.legacy_path):
+            self._migrate_legacy()
+        self._rebuild_index()
+        logging.info(f"Loaded {len(self._records)} seen items from {self.path}")
+        return self
+
+    def _migrate_legacy(self):
+        with open(self.legacy_path, 'r', encoding='utf-8') as f:
+            legacy = json.load(f)
+
+        now = int(time.time())
+        for entry in legacy:
+            if isinstance(entry, dict):
+                record = {'id': item_key(entry), 'source': entry.get('source', ''), 'title': entry.get('title', ''), 'seen': now}
+                if self.near_dup is not None:
+                    self._add_fingerprint(record, entry)
+            else:
+                # "date_title" string; dates never contain '_', titles may
+                date, _, title = str(entry).partition('_')
+                record = {'id': legacy_key({'date': date, 'title': title}), 'source': '', 'title': title, 'seen': now}
+            self._records.setdefault(record['id'], record)
+
+        logging.info(f"Migrating {len(self._records)} entries from {self.legacy_path} to {self.path}")
+        self.compact()
+
+    def _add_fingerprint(self, record, item):
+        sh, url_key = fingerprint(item)
+        record['sh'] = format(sh, '016x')
+        if url_key:
+            record['p'] = url_key
+
+    def _index(self, record):
+        if 'sh' not in record:
+            # Entries written before near-duplicate detection; the title is enough
+            self._add_fingerprint(record, record)
+        self.near_dup.add(record['id'], record.get('title'), int(record['sh'], 16), record.get('p'))
+
+    def _rebuild_index(self):
+        if self.near_dup is None:
+            return
+        self.near_dup.clear()
+        for record in self._records.values():
+            self._index(record)
+
+    def find(self, item):
+        """
+        Returns (record, near) for the retained entry matching `item`, where
+        `near` tells a near-duplicate from an exact match, or (None, False).
+        """
+        record = self._records.get(item_key(item)) or self._records.get(legacy_key(item))
+        if record is not None:
+            return record, False
+        if self.near_dup is not None:
+            sh, url_key = fingerprint(item)
+            match = self.near_dup.find(item.get('title'), sh, url_key)
+            if match is not None:
+                return self._records[match], True
+        return None, False
+
+    def is_known(self, item):
+        """
+        Side-effect free lookup, safe to call from scraper threads while
+        nothing is being added (e.g. to stop scrolling at known items).
+        """
+        return self.find(item)[0] is not None
+
+    def is_new(self, item):
+        record, near = self.find(item)
+        if near:
+            logging.debug(f"Near-duplicate of [{record.get('source')}] {record.get('title')}: "
+                          f"[{item.get('source')}] {item.get('title')}")
+            metrics.incr('dedup.near_duplicates')
+        return record is None
+
+    def add(self, item):
+        key = item_key(item)
+        if key in self._records:
+            return
+        record = {
+            'id': key,
+            'source': item.get('source', ''),
+            'title': item.get('title', ''),
+            'seen': int(time.time())
+        }
+        if self.near_dup is not None:
+            self._add_fingerprint(record, item)
+            self._index(record)
+        self._records[key] = record
+        self._pending.append(record)
+
+    def save(self):
+        """
+        Appends entries added since the last save, or compacts if one is due.
+        """
+        if time.time() - self._compacted_at > self.compact_every_days * DAY:
+            self.compact()
+            return
+        if not self._pending:
+            return
+        # One write per run: a crash can leave at most a truncated last line, which load() skips.
+        data = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in self._pending)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        logging.info(f"Appended {len(self._pending)} entries to {self.path}")
+        self._pending = []
+
+    def compact(self):
+        """
+        Applies retention policies and atomically rewrites the file.
+        """
+        now = time.time()
+        by_policy = {}
+        for record in self._records.values():
+            policy = self.policy_for(record.get('source'))
+            if policy.expired(record, now):
+                continue
+            by_policy.setdefault(id(policy), (policy, []))[1].append(record)
+
+        kept = []
+        for policy, records in by_policy.values():
+            records.sort(key=lambda r: r.get('seen', 0), reverse=True)
+            if policy.max_entries is not None:
+                records = records[:policy.max_entries]
+            kept.extend(records)
+        kept.sort(key=lambda r: r.get('seen', 0))
+
+        dropped = len(self._records) - len(kept)
+        self._records = {record['id']: record for record in kept}
+        self._pending = []
+        self._compacted_at = int(now)
+        self._rebuild_index()
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'meta': {'compacted': self._compacted_at}}) + '\n')
+            for record in kept:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        logging.info(f"Compacted {self.path}: kept {len(kept)}, dropped {dropped}")
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import metrics
+from http_client import get_session
+
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'http')
+
+class CachedResponse:
+    def __init__(self, url, status_code, text, not_modified=False):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.not_modified = not_modified
+
+class HttpCache:
+    """
+    On-disk HTTP cache keyed by URL.
+
+    Stores the body plus ETag/Last-Modified of each response and sends
+    conditional requests (If-None-Match / If-Modified-Since). On a 304 the
+    cached body is returned with not_modified=True, and scrapers can also
+    keep their parsed item list next to it (store_items / cached_items) to
+    skip parsing entirely.
+    """
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _read(self, url):
+        path = self._path(url)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable cache entry for {url}: {e}")
+            return None
+
+    def _write(self, url, entry):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _delete(self, url):
+        try:
+            os.remove(self._path(url))
+        except FileNotFoundError:
+            pass
+
+    def _count(self, hit, saved=0):
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.bytes_saved += saved
+            else:
+                self.misses += 1
+        metrics.incr('http_cache.hits' if hit else 'http_cache.misses')
+        if saved:
+            metrics.incr('http_cache.bytes_saved', saved)
+
+    def get(self, url, headers=None, timeout=None, session=None):
+        entry = self._read(url)
+        request_headers = dict(headers or {})
+        if entry:
+            if entry.get('etag'):
+                request_headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request_headers['If-Modified-Since'] = entry['last_modified']
+
+        response = (session or get_session()).get(url, headers=request_headers, timeout=timeout)
+
+        if response.status_code == 304 and entry:
+            self._count(True, len(entry.get('body', '').encode('utf-8')))
+            logging.info(f"HTTP cache hit (304): {url}")
+            return CachedResponse(url, 304, entry.get('body', ''), not_modified=True)
+
+        response.raise_for_status()
+        if response.encoding is None or response.encoding.lower() == 'iso-8859-1':
+            response.encoding = response.apparent_encoding
+        self._count(False)
+
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            self._write(url, {
+                'url': url,
+                'etag': etag,
+                'last_modified': last_modified,
+                'fetched': int(time.time()),
+                'body': response.text,
+                'items': None
+            })
+        else:
+            # Without validators the old entry can't be revalidated, and its
+            # body and items no longer match what the server returned
+            self._delete(url)
+        return CachedResponse(url, response.status_code, response.text)
+
+    def store_items(self, url, items):
+        """
+        Saves the parsed items for `url` next to its cached body.
+        """
+        entry = self._read(url)
+        if entry is None:
+            return
+        entry['items'] = items
+        self._write(url, entry)
+
+    def cached_items(self, url):
+        entry = self._read(url)
+        return entry.get('items') if entry else None
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'bytes_saved': self.bytes_saved
+            }
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_cache():
+    """
+    Returns the process-wide HttpCache.
+    """
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = HttpCache()
+        return _default_cache
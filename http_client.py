@@ -0,0 +1,93 @@
+import logging
+import random
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry, make_headers
+
+DEFAULT_TIMEOUT = (10, 30) # (connect, read) seconds
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# POST (e.g. Discord webhooks) is not idempotent: a 5xx or read timeout may
+# come after the message was delivered, so only a 429 (rejected before
+# processing) and connection errors are retried
+POST_RETRY_STATUSES = (429,)
+
+class JitteredRetry(Retry):
+    """
+    Exponential backoff with random jitter, so parallel requests don't retry in lockstep.
+    """
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return backoff + random.uniform(0, backoff) if backoff else 0
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method.upper() == 'POST':
+            return status_code in POST_RETRY_STATUSES
+        return super().is_retry(method, status_code, has_retry_after)
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that applies a default timeout when the caller doesn't pass one.
+    """
+    def __init__(self, *args, timeout=DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+def make_session(retries=3, backoff=1.0, pool_size=10, timeout=DEFAULT_TIMEOUT):
+    """
+    Builds a requests.Session with keep-alive connection pooling, gzip/brotli,
+    a default timeout and retries on connection errors and 429/5xx
+    (honouring Retry-After); POST only retries connection errors and 429.
+    """
+    retry = JitteredRetry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = TimeoutHTTPAdapter(
+        timeout=timeout,
+        max_retries=retry,
+        pool_connections=pool_size,
+        pool_maxsize=pool_size
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    # Advertises 'br' too when the brotli package is installed
+    session.headers.update(make_headers(accept_encoding=True))
+    return session
+
+_settings = {}
+_session = None
+_lock = threading.Lock()
+
+def configure(http_config):
+    """
+    Sets session options from the 'http' config section (retries, backoff,
+    pool_size, timeout). Must be called before the first get_session().
+    """
+    global _settings
+    _settings = {k: v for k, v in (http_config or {}).items() if k in ('retries', 'backoff', 'pool_size', 'timeout')}
+    if isinstance(_settings.get('timeout'), list):
+        _settings['timeout'] = tuple(_settings['timeout'])
+
+def get_session():
+    """
+    Returns the process-wide session shared by all scrapers and notifiers,
+    so repeated requests to one host reuse the same TLS connection.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            _session = make_session(**_settings)
+            logging.debug(f"HTTP session created ({_settings or 'defaults'})")
+        return _session
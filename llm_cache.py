@@ -0,0 +1,113 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import metrics
+from history_store import normalize_text, normalize_url
+
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'llm')
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+
+def cache_key(provider, model, prompt_version, items):
+    """
+    Content address of a summary: provider, model, prompt template version
+    and the normalized items. The source name is deliberately left out so the
+    same items seen through several sources share one summary.
+    """
+    normalized = sorted(
+        (normalize_text(item.get('title')), normalize_text(item.get('description')), normalize_url(item.get('link') or item.get('url')))
+        for item in items
+    )
+    raw = json.dumps([provider, model, prompt_version, normalized], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+class LLMCache:
+    """
+    On-disk cache of summaries, one small JSON file per key.
+    Hits refresh the file's mtime; when the directory grows past max_bytes
+    the least recently used entries are evicted.
+    """
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        cache_config = config.get('ai', {}).get('cache') or {}
+        if cache_config.get('enabled', True) is False:
+            return None
+        return cls(
+            directory=cache_config.get('dir', DEFAULT_CACHE_DIR),
+            max_bytes=int(cache_config.get('max_mb', DEFAULT_MAX_BYTES / (1024 * 1024)) * 1024 * 1024)
+        )
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                summary = json.load(f)['summary']
+            os.utime(path) # LRU: mark as recently used
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            metrics.incr('llm_cache.misses')
+            return None
+        with self._lock:
+            self.hits += 1
+        metrics.incr('llm_cache.hits')
+        return summary
+
+    def put(self, key, summary):
+        if not summary:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'created': int(time.time())}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        """
+        Deletes least recently used entries until the cache fits max_bytes.
+        """
+        if not os.path.isdir(self.directory):
+            return
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        if evicted:
+            logging.info(f"LLM cache: evicted {evicted} entries")
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0}
@@ -1,20 +1,18 @@
 
+import argparse
 import logging
-import time
-import os
 import yaml
-import json
 from datetime import datetime, timedelta
 
 # Import custom modules
-from scrapers.facebook import scrape_facebook_page
-from scrapers.ncu_incu import scrape_ncu_incu
-from scrapers.ncu_career import scrape_ncu_career
-from scrapers.google_site import scrape_google_site
-from scrapers.ncu_finance import scrape_ncu_finance
-from scrapers.ncu_club import scrape_ncu_club
-from notifier import send_email, send_discord_webhook
+from scrapers.registry import find_sources, make_job, commit_sources
 from summarizer import summarize_and_format
+from scheduler import run_jobs, DEFAULT_MAX_CONCURRENCY, DEFAULT_SOURCE_DEADLINE
+from history_store import SeenStore
+from prefilter import PreFilter
+from http_cache import get_cache
+import http_client
+import metrics
 
 # Setup Logging
 logging.basicConfig(
@@ -26,129 +24,86 @@ logging.basicConfig(
     ]
 )
 
-def load_history():
-    if os.path.exists('history.json'):
-        with open('history.json', 'r') as f:
-            return json.load(f)
-    return []
+def log_cache_stats():
+    stats = get_cache().stats()
+    if stats['hits'] or stats['misses']:
+        logging.info(f"HTTP cache: {stats['hits']} hits, {stats['misses']} misses "
+                     f"({stats['hit_rate']:.0%} hit rate, {stats['bytes_saved'] / 1024:.0f} KiB not re-downloaded)")
+
+def build_jobs(config, history=None):
+    """
+    Turns the enabled sources in config into scheduler jobs, in report order
+    (see scrapers.registry). Scraper modules are only imported when their job runs.
+    With `history`, infinite-scroll scrapers stop once they reach known items.
+    """
+    return [make_job(spec, name, site, config, history) for spec, name, site in find_sources(config)]
+
+def scrape_sources(config, history=None):
+    """
+    Runs every enabled scraper concurrently (see scheduler.run_jobs).
+    Returns (all_items, error_log) in the same order as build_jobs().
+    """
+    system = config.get('system', {})
+    return run_jobs(
+        build_jobs(config, history),
+        max_workers=system.get('max_concurrency', DEFAULT_MAX_CONCURRENCY),
+        deadline=system.get('source_deadline', DEFAULT_SOURCE_DEADLINE)
+    )
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Info Tracker daily scrape and report")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="print the import time of every module a run with config.yaml loads, then exit")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
 
-def save_history(history):
-    with open('history.json', 'w') as f:
-        json.dump(history, f, indent=4)
-
-def is_new(item, history):
-    # Create a unique ID for the item
-    unique_id = f"{item['date']}_{item['title']}"
-    return unique_id not in history
-
-def main():
     # 1. Load Config
     with open('config.yaml', 'r') as f:
         config = yaml.safe_load(f)
 
-    all_items = []
-    error_log = []
-    
-    # 2. Scrape NCU Sources
-    sites = config.get('sites', {})
-    
-    if sites.get('ncu_club', {}).get('enabled', False):
-        try:
-            logging.info(f"Scraping NCU Club: {sites['ncu_club']['url']}")
-            all_items.extend(scrape_ncu_club(config))
-        except Exception as e:
-            msg = f"Error building NCU Club scraper: {str(e)}"
-            logging.error(msg)
-            error_log.append(msg)
-            
-    if sites.get('ncu_finance', {}).get('enabled', False):
-        try:
-            logging.info(f"Scraping NCU Finance: {sites['ncu_finance']['url']}")
-            all_items.extend(scrape_ncu_finance(config))
-        except Exception as e:
-            msg = f"Error building NCU Finance scraper: {str(e)}"
-            logging.error(msg)
-            error_log.append(msg)
-
-    if sites.get('ncu_incu', {}).get('enabled', False):
-        try:
-            logging.info(f"Scraping NCU iNCU: {sites['ncu_incu']['url']}")
-            all_items.extend(scrape_ncu_incu(config))
-        except Exception as e:
-            msg = f"Error building NCU iNCU scraper: {str(e)}"
-            logging.error(msg)
-            error_log.append(msg)
-            
-    if sites.get('ncu_career', {}).get('enabled', False):
-        try:
-            logging.info(f"Scraping NCU Career: {sites['ncu_career']['url']}")
-            all_items.extend(scrape_ncu_career(config))
-        except Exception as e:
-            msg = f"Error building NCU Career scraper: {str(e)}"
-            logging.error(msg)
-            error_log.append(msg)
-
-    if sites.get('google_site', {}).get('enabled', False):
-        try:
-            logging.info(f"Scraping Adaptive Learning: {sites['google_site']['url']}")
-            all_items.extend(scrape_google_site(config))
-        except Exception as e:
-            msg = f"Error building Google Site scraper: {str(e)}"
-            logging.error(msg)
-            error_log.append(msg)
-
-    # 3. Scrape KOCPC
-    if config.get('kocpc', {}).get('enabled', False):
-        try:
-            logging.info(f"Scraping KOCPC: {config['kocpc']['url']}")
-            from scrapers.kocpc import scrape_kocpc
-            all_items.extend(scrape_kocpc(config['kocpc']['url']))
-        except Exception as e:
-            msg = f"Error building KOCPC scraper: {str(e)}"
-            logging.error(msg)
-            error_log.append(msg)
-
-    # 3. Scrape Facebook Groups
-    if sites.get('facebook', {}).get('enabled', False):
-        try:
-            from scrapers.facebook import scrape_facebook_page
-            logging.info("Scraping Facebook Groups/Pages...")
-            fb_items = scrape_facebook_page(config)
-            all_items.extend(fb_items)
-        except Exception as e:
-            msg = f"Error scraping Facebook Pages: {str(e)}"
-            logging.error(msg)
-            error_log.append(msg)
-
-    # 3.5 Personal Feed "Doom Scroll"
-    if config['sites'].get('facebook', {}).get('feed_enabled', False):
-        try:
-            from scrapers.facebook import scrape_personal_feed
-            logging.info("Starting Personal Feed Doom Scroll...")
-            feed_items = scrape_personal_feed(config)
-            all_items.extend(feed_items)
-        except Exception as e:
-            msg = f"Error scraping Facebook Feed: {str(e)}"
-            logging.error(msg)
-            error_log.append(msg)
+    if args.profile_startup:
+        from startup_profile import report
+        print(report(config))
+        return
+
+    http_client.configure(config.get('http'))
+
+    # Loaded first so scrapers can stop scrolling at already seen items
+    history = SeenStore.from_config(config).load()
+
+    # 2-3. Scrape all sources concurrently
+    all_items, error_log = scrape_sources(config, history)
 
     # 4. Filter New Items
-    history = load_history()
     new_items = []
     
     for item in all_items:
-        if is_new(item, history):
+        if history.is_new(item):
             new_items.append(item)
             # Add to history immediately to prevent dupes in same run
-            history.append(f"{item['date']}_{item['title']}")
+            history.add(item)
             
     logging.info(f"Total items scraped: {len(all_items)}")
-    logging.info(f"New items to report: {len(new_items)}")
-    
+
     if not new_items and not error_log:
         logging.info("No new items found and no errors. Skipping email.")
+        history.save()
+        commit_sources()
+        log_cache_stats()
+        metrics.log_summary()
         return
 
+    # 4.5 Drop obvious noise locally (rules + model trained on past Filtered Logs);
+    # the dropped titles are still listed in the report
+    prefilter = PreFilter.from_config(config)
+    prefiltered = []
+    if prefilter:
+        new_items = prefilter.filter(new_items)
+        prefiltered = prefilter.dropped
+    logging.info(f"New items to report: {len(new_items)}")
+
     # --- Refactored: Group First, then Summarize Source ---
     grouped_data = {}
     
@@ -159,25 +114,15 @@ def main():
             grouped_data[source] = {'items': [], 'summary': None}
         grouped_data[source]['items'].append(item)
         
-    # 2. AI Processing (Per Source)
+    # 2. AI Processing (small sources batched into one prompt, batches run in parallel)
     if config.get('ai', {}).get('enabled', False):
-        logging.info("AI Summarization enabled. Processing per source...")
-        from ai_helper import summarize_group
-        
-        for source, data in grouped_data.items():
-            logging.info(f"Summarizing source: {source} ({len(data['items'])} items)")
-            try:
-                summary = summarize_group(source, data['items'], config)
-                if summary:
-                    data['summary'] = summary
-                
-                # Rate Limit Protection (free tier)
-                time.sleep(10) 
-            except Exception as e:
-                logging.error(f"Error summarizing {source}: {e}")
+        from ai_helper import summarize_all
+        summarize_all(grouped_data, config)
+        if prefilter:
+            prefilter.learn(grouped_data)
 
     # 5. Summarize (Generate Report)
-    report_html = summarize_and_format(grouped_data, error_log)
+    report_html = summarize_and_format(grouped_data, error_log, prefiltered)
     
     # 6. Send Notifications
     today = datetime.now().strftime('%Y-%m-%d')
@@ -185,17 +130,22 @@ def main():
 
     # Send Email if enabled
     if config.get('email', {}).get('enabled', False):
+        from notifier import send_email
         logging.info(f"Sending email to {config['email']['recipient']}...")
         send_email(config, subject, report_html)
         logging.info("Email sent successfully.")
 
     # Send Discord if enabled
     if config.get('discord', {}).get('enabled', False):
+        from notifier import send_discord_webhook
         logging.info("Attempting to send Discord webhook...")
         send_discord_webhook(config, subject, report_html, error_log)
 
     # 7. Save History
-    save_history(history)
+    history.save()
+    commit_sources()
+    log_cache_stats()
+    metrics.log_summary()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,42 @@
+import logging
+import threading
+
+# Simple process-wide counters/timers for one run.
+# Anything can record into it; main() logs the summary at the end.
+_lock = threading.Lock()
+_counters = {}
+_timings = {}
+
+def incr(name, amount=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+def observe(name, seconds):
+    """
+    Records a duration (in seconds) under `name`.
+    """
+    with _lock:
+        _timings.setdefault(name, []).append(seconds)
+
+def snapshot():
+    with _lock:
+        return {
+            'counters': dict(_counters),
+            'timings': {k: list(v) for k, v in _timings.items()}
+        }
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _timings.clear()
+
+def log_summary():
+    data = snapshot()
+    if not data['counters'] and not data['timings']:
+        return
+    logging.info("Run metrics:")
+    for name in sorted(data['counters']):
+        logging.info(f"  {name}: {data['counters'][name]}")
+    for name in sorted(data['timings']):
+        values = data['timings'][name]
+        logging.info(f"  {name}: total {sum(values):.1f}s over {len(values)}")
@@ -0,0 +1,117 @@
+import hashlib
+import re
+
+from prompt_builder import text_terms
+
+BITS = 64
+DEFAULT_MAX_DISTANCE = 3 # Hamming distance for "same item, reworded"
+DEFAULT_URL_MAX_DISTANCE = 8 # looser when both items have the same permalink
+MIN_TITLE_CHARS = 12 # shorter titles are too generic for fuzzy matching
+
+# Status prefixes that sites add or change over time, e.g. 【已額滿】 or [報名中]
+STATUS_PREFIX = re.compile(
+    r'^\s*[\[【(（]\s*(已額滿|額滿|報名中|未開放報名|開放報名|已截止|截止|已結束|延期|取消|更新|最新|置頂|new|updated?|closed|full)\s*[\]】)）]\s*',
+    re.IGNORECASE
+)
+NUMBER = re.compile(r'\d+')
+
+def normalize_title(title):
+    """
+    Lowercased, whitespace-collapsed title without status prefixes or a trailing ellipsis.
+    """
+    title = ' '.join(str(title or '').split()).lower()
+    while True:
+        stripped = STATUS_PREFIX.sub('', title, count=1)
+        if stripped == title:
+            break
+        title = stripped
+    return re.sub(r'(\.\.\.|…)$', '', title).strip()
+
+def simhash(text):
+    """
+    64-bit SimHash over words and CJK character bigrams.
+    """
+    weights = [0] * BITS
+    for term in text_terms(text):
+        h = int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(BITS) if weights[bit] > 0)
+
+def url_hash(url):
+    """
+    Hash of an already normalized permalink, or None for site roots, which
+    are never an item's own page.
+    """
+    if not url or url.split('/', 3)[-1] in ('', '/'):
+        return None
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+class NearDupIndex:
+    """
+    SimHash index with LSH banding: the 64-bit hash is split into
+    max_distance + 1 bands, so any two hashes within max_distance bits share
+    at least one band exactly (pigeonhole). A lookup only compares against
+    the entries in matching band buckets, plus entries with the same
+    permalink (compared with the looser url_max_distance).
+
+    Titles whose numbers differ ("2026年3月" vs "2026年4月") are never
+    duplicates, however close their hashes or whether their URLs match.
+    """
+    def __init__(self, max_distance=DEFAULT_MAX_DISTANCE, url_max_distance=DEFAULT_URL_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.url_max_distance = url_max_distance
+        self.band_count = max_distance + 1
+        self.band_width = BITS // self.band_count
+        self.clear()
+
+    def clear(self):
+        self._entries = {} # key -> (simhash, numbers, fuzzy)
+        self._bands = [{} for _ in range(self.band_count)]
+        self._urls = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _band_values(self, sh):
+        mask = (1 << self.band_width) - 1
+        return [(sh >> (i * self.band_width)) & mask for i in range(self.band_count)]
+
+    def add(self, key, title, sh, url_key=None):
+        if key in self._entries:
+            return
+        normalized = normalize_title(title)
+        fuzzy = len(normalized) >= MIN_TITLE_CHARS
+        self._entries[key] = (sh, NUMBER.findall(normalized), fuzzy)
+        if fuzzy:
+            for band, value in zip(self._bands, self._band_values(sh)):
+                band.setdefault(value, []).append(key)
+        if url_key:
+            self._urls.setdefault(url_key, []).append(key)
+
+    def find(self, title, sh, url_key=None):
+        """
+        Returns the key of an indexed near-duplicate, or None.
+        """
+        normalized = normalize_title(title)
+        numbers = NUMBER.findall(normalized)
+
+        for key in self._urls.get(url_key, ()) if url_key else ():
+            other_sh, other_numbers, _ = self._entries[key]
+            if other_numbers == numbers and hamming(sh, other_sh) <= self.url_max_distance:
+                return key
+        if len(normalized) < MIN_TITLE_CHARS:
+            return None
+        seen = set()
+        for band, value in zip(self._bands, self._band_values(sh)):
+            for key in band.get(value, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                other_sh, other_numbers, fuzzy = self._entries[key]
+                if fuzzy and other_numbers == numbers and hamming(sh, other_sh) <= self.max_distance:
+                    return key
+        return None
@@ -2,8 +2,8 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import logging
-import requests
 import json
+from http_client import get_session
 
 def send_discord_webhook(config, subject, body_html, errors=None):
     """
@@ -36,7 +36,7 @@ def send_discord_webhook(config, subject, body_html, errors=None):
     
     try:
         logging.info("Sending Discord webhook...")
-        response = requests.post(webhook_url, json=message)
+        response = get_session().post(webhook_url, json=message)
         response.raise_for_status()
         logging.info("Discord message sent successfully.")
     except Exception as e:
@@ -0,0 +1,229 @@
+import json
+import logging
+import math
+import os
+import re
+import threading
+
+import metrics
+from history_store import normalize_text
+from prompt_builder import text_terms
+
+DEFAULT_MODEL_PATH = os.path.join('.cache', 'prefilter_model.json')
+DEFAULT_THRESHOLD = 0.97 # P(noise) needed before the model drops an item
+DEFAULT_MIN_EXAMPLES = 50 # per class, before the model is trusted
+MAX_TERMS = 20000
+RULE_TEXT_CHARS = 200 # rules look at the title plus the start of the description
+# Only user-generated feeds carry this kind of noise; official announcements
+# and news ("社團開箱", "新功能開箱") must never be dropped by a keyword
+DEFAULT_SOURCES = ('Personal Feed', 'Facebook Group/Page')
+
+# The obvious cases of the noise classes listed in ai_helper.TASK_INSTRUCTIONS.
+# Kept conservative: anything borderline is left for the model to judge.
+DEFAULT_RULES = {
+    'question': [
+        r'^\s*(請問|求救|求助|求解|新手求問|想請教).{0,60}[?？嗎呢]',
+        r'(有沒有人知道|有人知道.{0,10}嗎|(該怎麼辦|怎麼解決)\s*[?？]|help me|anyone know|why is (this|my))',
+    ],
+    'show_off': [
+        r'(我的.{0,10}開箱|開箱一下|剛入手|剛組好|組好了|我的新電腦|my new (pc|build|setup|rig)|look at my)',
+    ],
+    'diary': [
+        r'(我退休了|搬家了|今天晚餐|生活日記|my thoughts on life|dinner photos?)',
+    ],
+    'clickbait': [
+        r'(你絕對想不到|不看後悔|震驚[!！]|必看[!！]|you won\'t believe)',
+    ],
+}
+
+FILTERED_LINE = re.compile(r'^\s*[-*]\s*\[?(.+?)\]?\s*:\s*\[?(.*?)\]?\s*$')
+
+class NoiseModel:
+    """
+    Multinomial naive Bayes over title/description terms with two classes,
+    'noise' and 'keep', trained from the Filtered Log of past summaries.
+    """
+    CLASSES = ('noise', 'keep')
+
+    def __init__(self, path=DEFAULT_MODEL_PATH):
+        self.path = path
+        self.docs = {c: 0 for c in self.CLASSES}
+        self.totals = {c: 0 for c in self.CLASSES}
+        self.counts = {} # term -> [noise count, keep count]
+        self._lock = threading.Lock()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return self
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.docs = data['docs']
+            self.totals = data['totals']
+            self.counts = data['counts']
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Ignoring unreadable pre-filter model {self.path}: {e}")
+        return self
+
+    def save(self):
+        # Keep the file small: only the most frequent terms survive
+        if len(self.counts) > MAX_TERMS:
+            kept = sorted(self.counts.items(), key=lambda kv: kv[1][0] + kv[1][1], reverse=True)[:MAX_TERMS]
+            self.counts = dict(kept)
+            self.totals = {c: sum(v[i] for v in self.counts.values()) for i, c in enumerate(self.CLASSES)}
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'docs': self.docs, 'totals': self.totals, 'counts': self.counts}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def learn(self, item, label):
+        index = self.CLASSES.index(label)
+        with self._lock:
+            self.docs[label] += 1
+            for term in _item_terms(item):
+                self.counts.setdefault(term, [0, 0])[index] += 1
+                self.totals[label] += 1
+
+    def trained(self, min_examples):
+        return all(self.docs[c] >= min_examples for c in self.CLASSES)
+
+    def noise_probability(self, item):
+        vocab = len(self.counts) + 1
+        total_docs = sum(self.docs.values())
+        scores = []
+        for index, c in enumerate(self.CLASSES):
+            score = math.log((self.docs[c] + 1) / (total_docs + 2))
+            for term in _item_terms(item):
+                count = self.counts.get(term, (0, 0))[index]
+                score += math.log((count + 1) / (self.totals[c] + vocab))
+            scores.append(score)
+        # Softmax over the two log scores
+        top = max(scores)
+        noise, keep = (math.exp(s - top) for s in scores)
+        return noise / (noise + keep)
+
+def _item_terms(item):
+    return text_terms(f"{item.get('title') or ''} {item.get('description') or ''}")
+
+def compile_rules(extra_rules=None):
+    """
+    Merges config['prefilter']['rules'] ({name: [regex, ...]}) into the defaults.
+    """
+    rules = {name: list(patterns) for name, patterns in DEFAULT_RULES.items()}
+    for name, patterns in (extra_rules or {}).items():
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        rules.setdefault(name, []).extend(patterns)
+    return {
+        name: re.compile('|'.join(f'(?:{p})' for p in patterns), re.IGNORECASE)
+        for name, patterns in rules.items() if patterns
+    }
+
+def parse_filtered_log(summary):
+    """
+    Returns the titles listed under '## Filtered Log' in a summary.
+    """
+    if not summary or '## Filtered Log' not in summary:
+        return []
+    titles = []
+    for line in summary.split('## Filtered Log', 1)[1].splitlines():
+        match = FILTERED_LINE.match(line)
+        if match and 'nothing significant' not in match.group(1).lower():
+            titles.append(match.group(1).strip())
+    return titles
+
+class PreFilter:
+    """
+    Drops obvious noise before summarization: regex rules first, then the
+    naive Bayes model once it has seen enough examples. After a run,
+    learn() feeds the LLM's Filtered Log back into the model.
+    """
+    def __init__(self, rules, model=None, threshold=DEFAULT_THRESHOLD, min_examples=DEFAULT_MIN_EXAMPLES, sources=None):
+        self.rules = rules
+        self.model = model
+        self.threshold = threshold
+        self.min_examples = min_examples
+        self.sources = DEFAULT_SOURCES if sources is None else sources
+        self.drops = {}
+        self.dropped = [] # (item, rule), listed in the report instead of the LLM's Filtered Log
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Returns None when config['prefilter']['enabled'] is false.
+        """
+        prefilter_config = config.get('prefilter') or {}
+        if prefilter_config.get('enabled', True) is False:
+            return None
+        model_config = prefilter_config.get('model') or {}
+        model = None
+        if model_config.get('enabled', True):
+            model = NoiseModel(model_config.get('path', DEFAULT_MODEL_PATH)).load()
+        return cls(
+            compile_rules(prefilter_config.get('rules')),
+            model=model,
+            threshold=model_config.get('threshold', DEFAULT_THRESHOLD),
+            min_examples=model_config.get('min_examples', DEFAULT_MIN_EXAMPLES),
+            sources=prefilter_config.get('sources')
+        )
+
+    def applies_to(self, source):
+        # sources: source-name prefixes, as in history.sources
+        return any((source or '').startswith(prefix) for prefix in self.sources)
+
+    def classify(self, item):
+        """
+        Returns the name of the rule that drops `item` ('model' for the
+        classifier), or None to keep it.
+        """
+        text = f"{item.get('title') or ''}\n{(item.get('description') or '')[:RULE_TEXT_CHARS]}"
+        for name, pattern in self.rules.items():
+            if pattern.search(text):
+                return name
+        if self.model and self.model.trained(self.min_examples):
+            if self.model.noise_probability(item) >= self.threshold:
+                return 'model'
+        return None
+
+    def filter(self, items):
+        """
+        Returns the items to keep. Dropped items go to self.dropped, counts
+        per rule to self.drops and the run metrics.
+        """
+        kept = []
+        for item in items:
+            rule = self.classify(item) if self.applies_to(item.get('source')) else None
+            if rule is None:
+                kept.append(item)
+                continue
+            self.drops[rule] = self.drops.get(rule, 0) + 1
+            self.dropped.append((item, rule))
+            metrics.incr(f'prefilter.dropped.{rule}')
+            logging.debug(f"Pre-filter ({rule}) dropped: {item.get('title')}")
+        if self.drops:
+            counts = ", ".join(f"{rule}={count}" for rule, count in sorted(self.drops.items()))
+            logging.info(f"Pre-filter dropped {len(items) - len(kept)} of {len(items)} items ({counts})")
+        return kept
+
+    def learn(self, grouped_data):
+        """
+        Trains the model from this run's summaries: items named in a source's
+        Filtered Log are noise, the rest of that source's items are kept.
+        Sources without a summary teach nothing.
+        """
+        if not self.model:
+            return
+        learned = 0
+        for source, data in grouped_data.items():
+            if not data.get('summary') or not self.applies_to(source):
+                continue
+            filtered = [normalize_text(title) for title in parse_filtered_log(data['summary'])]
+            for item in data['items']:
+                title = normalize_text(item.get('title'))
+                noise = bool(title) and any(f and (f in title or title in f) for f in filtered)
+                self.model.learn(item, 'noise' if noise else 'keep')
+                learned += 1
+        if learned:
+            self.model.save()
+            logging.info(f"Pre-filter model updated with {learned} items ({self.model.docs['noise']} noise / {self.model.docs['keep']} keep total)")
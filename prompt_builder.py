@@ -0,0 +1,165 @@
+import logging
+import re
+
+import metrics
+
+DEFAULT_PROMPT_TOKEN_BUDGET = 4000 # per source, for the item list only
+DEFAULT_MAX_DESCRIPTION_CHARS = 600
+MIN_DESCRIPTION_TOKENS = 15 # below this a description is dropped rather than cut
+ITEM_OVERHEAD_TOKENS = 8 # "Item n:\nTitle: ...\nDescription: ..." scaffolding
+
+CJK = re.compile(r'[\u3000-\u9fff\uac00-\ud7af\uff00-\uffef]')
+WORD = re.compile(r'[a-z0-9]+')
+SENTENCE_END = re.compile(r'[.!?。！？\n]')
+
+def estimate_tokens(text):
+    """
+    Rough token estimate: ~1 token per CJK character, ~4 characters per token otherwise.
+    """
+    if not text:
+        return 0
+    cjk = len(CJK.findall(text))
+    return cjk + (len(text) - cjk) // 4 + 1
+
+def chars_for_tokens(text, tokens):
+    """
+    Longest prefix length of `text` estimated to fit in `tokens`.
+    """
+    if estimate_tokens(text) <= tokens:
+        return len(text)
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+def truncate(text, max_chars):
+    """
+    Cuts `text` to at most `max_chars`, preferring a sentence boundary in the
+    last third, and marks the cut with an ellipsis.
+    """
+    if len(text) <= max_chars:
+        return text
+    if max_chars <= 1:
+        return ''
+    cut = text[:max_chars - 1]
+    ends = [m.end() for m in SENTENCE_END.finditer(cut) if m.end() >= max_chars * 2 // 3]
+    if ends:
+        cut = cut[:ends[-1]]
+    return cut.rstrip() + '…'
+
+def clean_description(text):
+    # Feed posts carry lots of blank lines and "See more" noise
+    text = ' '.join(str(text or '').split())
+    return re.sub(r'\s*(…|\.\.\.)?\s*(See more|查看更多|顯示更多)$', '', text, flags=re.IGNORECASE)
+
+def text_terms(text):
+    """
+    Words for Latin text, character bigrams for CJK text.
+    """
+    text = text.lower()
+    terms = set(WORD.findall(text))
+    cjk = ''.join(CJK.findall(text))
+    terms.update(cjk[i:i + 2] for i in range(len(cjk) - 1))
+    return terms
+
+def rank_items(items):
+    """
+    Orders item indexes by novelty: each pick is the item adding the most
+    terms not already covered by earlier picks, ties broken by length.
+    Near-duplicates and reposts therefore sink to the bottom.
+    """
+    terms = [text_terms(f"{item.get('title') or ''} {item.get('description') or ''}") for item in items]
+    remaining = set(range(len(items)))
+    covered = set()
+    order = []
+    while remaining:
+        best = max(remaining, key=lambda i: (len(terms[i] - covered), len(terms[i]), -i))
+        order.append(best)
+        covered |= terms[best]
+        remaining.remove(best)
+    return order
+
+def fit_items(items, budget=DEFAULT_PROMPT_TOKEN_BUDGET, max_description_chars=DEFAULT_MAX_DESCRIPTION_CHARS):
+    """
+    Returns copies of `items` whose formatted size fits `budget` tokens.
+
+    Descriptions are cleaned and capped at max_description_chars, then, if
+    still over budget, shortened evenly (the longest ones first) until they
+    fit. If even the titles don't fit, the least novel items are dropped.
+    The original item order is kept.
+    """
+    prepared = []
+    for item in items:
+        item = dict(item)
+        item['description'] = truncate(clean_description(item.get('description')), max_description_chars)
+        prepared.append(item)
+
+    fixed = [estimate_tokens(str(item.get('title') or '')) + ITEM_OVERHEAD_TOKENS for item in prepared]
+    if sum(fixed) > budget:
+        keep = []
+        used = 0
+        for i in rank_items(prepared):
+            if used + fixed[i] > budget and keep:
+                continue
+            keep.append(i)
+            used += fixed[i]
+        dropped = len(prepared) - len(keep)
+        logging.info(f"Prompt budget: dropped {dropped} least novel of {len(prepared)} items")
+        metrics.incr('prompt.items_dropped', dropped)
+        keep.sort()
+        prepared = [prepared[i] for i in keep]
+        fixed = [fixed[i] for i in keep]
+
+    # Water-filling: every description gets an equal share of what's left,
+    # shares unused by short descriptions go to the longer ones
+    available = budget - sum(fixed)
+    costs = [estimate_tokens(item['description']) for item in prepared]
+    if sum(costs) <= available:
+        return prepared
+
+    order = sorted(range(len(prepared)), key=lambda i: costs[i])
+    allowance = {}
+    for n, i in enumerate(order):
+        share = max(0, available) // (len(order) - n)
+        allowance[i] = min(costs[i], share)
+        available -= allowance[i]
+
+    truncated = 0
+    for i, item in enumerate(prepared):
+        if allowance[i] < costs[i]:
+            description = item['description']
+            if allowance[i] < MIN_DESCRIPTION_TOKENS:
+                item['description'] = ''
+            else:
+                item['description'] = truncate(description, chars_for_tokens(description, allowance[i]))
+            truncated += 1
+    metrics.incr('prompt.descriptions_truncated', truncated)
+    return prepared
+
+def fit_groups(grouped_data, config):
+    """
+    Applies fit_items() to every group with the limits from config['ai']
+    (prompt_token_budget, max_description_chars).
+    Returns {source_name: {'items': fitted items}}; `grouped_data` is untouched.
+    """
+    ai_config = config.get('ai', {})
+    budget = ai_config.get('prompt_token_budget', DEFAULT_PROMPT_TOKEN_BUDGET)
+    max_chars = ai_config.get('max_description_chars', DEFAULT_MAX_DESCRIPTION_CHARS)
+    return {
+        source: {'items': fit_items(data['items'], budget, max_chars)}
+        for source, data in grouped_data.items()
+    }
+
+def report_prompt(prompt):
+    """
+    Logs and records the estimated size of one outgoing prompt.
+    """
+    tokens = estimate_tokens(prompt)
+    metrics.incr('ai.calls')
+    metrics.incr('ai.prompt_tokens', tokens)
+    logging.info(f"AI call: ~{tokens} prompt tokens")
+    return tokens
@@ -0,0 +1,164 @@
+import logging
+import re
+import threading
+import time
+
+import metrics
+
+# Free-tier defaults; override with config['ai']['rate_limit']
+PROVIDER_LIMITS = {
+    'groq': {'requests_per_minute': 30, 'tokens_per_minute': 12000},
+    'gemini': {'requests_per_minute': 10, 'tokens_per_minute': 250000},
+    'openai': {'requests_per_minute': 500, 'tokens_per_minute': 200000},
+    'mock': {'requests_per_minute': 100000},
+}
+MAX_BACKOFF = 60 # seconds
+
+def parse_duration(value):
+    """
+    Parses rate-limit reset values: "6s", "1m2.5s", "250ms", "2.5" (seconds).
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total = 0.0
+    matched = False
+    for amount, unit in re.findall(r'([\d.]+)\s*(ms|h|m|s)', value):
+        matched = True
+        amount = float(amount)
+        total += {'ms': amount / 1000, 's': amount, 'm': amount * 60, 'h': amount * 3600}[unit]
+    return total if matched else None
+
+class TokenBucket:
+    """
+    Classic token bucket refilled continuously at capacity per minute.
+    """
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def consume(self, amount):
+        self.level -= min(amount, self.capacity)
+
+    def set_remaining(self, remaining, now):
+        self._refill(now)
+        self.level = min(self.level, float(remaining))
+
+class RateLimiter:
+    """
+    Per-provider limiter tracking requests and tokens per minute.
+
+    acquire() only sleeps when a bucket is empty; update_from_headers()
+    syncs the buckets with the provider's x-ratelimit-* headers, and
+    backoff() pauses all callers after a 429. Thread-safe.
+    """
+    def __init__(self, provider, requests_per_minute, tokens_per_minute=None):
+        self.provider = provider
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.blocked_until = 0.0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=0):
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(
+                    self.blocked_until - now,
+                    self.requests.wait_time(1, now),
+                    self.tokens.wait_time(tokens, now) if self.tokens else 0.0
+                )
+                if wait <= 0:
+                    self.requests.consume(1)
+                    if self.tokens:
+                        self.tokens.consume(tokens)
+                    break
+            time.sleep(wait)
+            waited += wait
+        if waited:
+            logging.info(f"Rate limiter ({self.provider}): waited {waited:.1f}s")
+            metrics.observe(f"ai.rate_limit_wait.{self.provider}", waited)
+
+    def update_from_headers(self, headers):
+        """
+        Reads OpenAI/Groq style headers, e.g. x-ratelimit-remaining-requests
+        and x-ratelimit-reset-tokens.
+        """
+        if not headers:
+            return
+        with self._lock:
+            now = time.monotonic()
+            for kind, bucket in (('requests', self.requests), ('tokens', self.tokens)):
+                remaining = headers.get(f'x-ratelimit-remaining-{kind}')
+                if bucket is None or remaining is None:
+                    continue
+                try:
+                    remaining = float(remaining)
+                except ValueError:
+                    continue
+                bucket.set_remaining(remaining, now)
+                reset = parse_duration(headers.get(f'x-ratelimit-reset-{kind}'))
+                if remaining <= 0 and reset:
+                    self.blocked_until = max(self.blocked_until, now + reset)
+            self.failures = 0
+
+    def backoff(self, retry_after=None):
+        """
+        Called after a 429: blocks every caller for Retry-After, or an exponential delay.
+        """
+        with self._lock:
+            self.failures += 1
+            delay = parse_duration(retry_after) or min(MAX_BACKOFF, 2 ** self.failures)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        logging.warning(f"Rate limited by {self.provider}, backing off {delay:.1f}s")
+        metrics.incr(f"ai.rate_limited.{self.provider}")
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(provider, config):
+    """
+    Returns the shared limiter for `provider`. Limits come from
+    config['ai']['rate_limit'], else the legacy system.rate_limit_delay
+    (seconds between calls), else PROVIDER_LIMITS.
+    """
+    with _limiters_lock:
+        if provider not in _limiters:
+            limits = dict(PROVIDER_LIMITS.get(provider, {'requests_per_minute': 30}))
+            delay = config.get('system', {}).get('rate_limit_delay')
+            if delay:
+                limits['requests_per_minute'] = 60.0 / delay
+            limits.update(config.get('ai', {}).get('rate_limit') or {})
+            _limiters[provider] = RateLimiter(
+                provider,
+                limits['requests_per_minute'],
+                limits.get('tokens_per_minute')
+            )
+        return _limiters[provider]
+
+def is_rate_limit_error(e):
+    return getattr(e, 'status_code', None) == 429 or type(e).__name__ in ('RateLimitError', 'ResourceExhausted', 'TooManyRequests')
+
+def retry_after(e):
+    response = getattr(e, 'response', None)
+    headers = getattr(response, 'headers', None)
+    return headers.get('retry-after') if headers else None
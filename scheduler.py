@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+
+import metrics
+from scrapers.browser import AsyncBrowserPool
+
+DEFAULT_MAX_CONCURRENCY = 3
+DEFAULT_SOURCE_DEADLINE = 300 # seconds
+
+class SourceJob:
+    """
+    One scraper run. `run` is called as run(pool) and returns a list of items.
+    With is_async=True, `run` is a coroutine function and gets the shared
+    AsyncBrowserPool; sync jobs (plain HTTP) get None.
+    `cost` is a relative runtime hint; expensive jobs are started first.
+    """
+    def __init__(self, name, run, error_prefix=None, deadline=None, is_async=False, cost=1):
+        self.name = name
+        self.run = run
+        self.error_prefix = error_prefix or f"Error scraping {name}"
+        self.deadline = deadline
+        self.is_async = is_async
+        self.cost = cost
+
+def run_jobs(jobs, max_workers=DEFAULT_MAX_CONCURRENCY, deadline=DEFAULT_SOURCE_DEADLINE):
+    """
+    Runs scraper jobs concurrently in two lanes:
+    - sync jobs (plain HTTP) on up to `max_workers` threads;
+    - async jobs on one event loop in a separate thread, sharing a single
+      AsyncBrowserPool (so every browser scraper uses one Chromium and its
+      warm contexts), with at most `max_workers` in flight.
+    A job that runs longer than its deadline is reported in the error log and
+    its result is dropped. If every thread is stuck on such a job, a
+    replacement thread takes over the queue, so the sync jobs behind it
+    still run.
+
+    Returns (all_items, error_log), merged in job order.
+    """
+    if not jobs:
+        return [], []
+
+    # Longest jobs first, so a slow source doesn't start last and finish alone
+    by_cost = sorted(range(len(jobs)), key=lambda i: -jobs[i].cost)
+    sync_indexes = [index for index in by_cost if not jobs[index].is_async]
+    async_indexes = [index for index in by_cost if jobs[index].is_async]
+    work = queue.Queue()
+    for index in sync_indexes:
+        work.put(index)
+    threads = []
+
+    results = [None] * len(jobs)
+    started = [None] * len(jobs)
+    finished = [threading.Event() for _ in jobs]
+    busy_with = {} # thread -> job index
+
+    def limit_for(index):
+        return jobs[index].deadline or deadline
+
+    def overdue(index):
+        if index is None or started[index] is None or finished[index].is_set():
+            return False
+        return time.monotonic() - started[index] > limit_for(index)
+
+    def worker():
+        me = threading.current_thread()
+        while True:
+            try:
+                index = work.get_nowait()
+            except queue.Empty:
+                return
+            job = jobs[index]
+            busy_with[me] = index
+            started[index] = time.monotonic()
+            logging.info(f"Scraping {job.name}...")
+            try:
+                results[index] = ('ok', job.run(None))
+            except Exception as e:
+                results[index] = ('error', e)
+            metrics.observe(f"scrape.{job.name}", time.monotonic() - started[index])
+            finished[index].set()
+            busy_with.pop(me, None)
+
+    def start_worker():
+        # Daemon threads: a source stuck past its deadline must not keep the process alive.
+        thread = threading.Thread(target=worker, daemon=True)
+        threads.append(thread)
+        thread.start()
+
+    def unstick():
+        """
+        Starts a replacement thread when every live thread is stuck on an
+        overdue job while jobs are still queued.
+        """
+        live = [t for t in threads if t.is_alive()]
+        if work.empty() or any(not overdue(busy_with.get(t)) for t in live):
+            return
+        if live:
+            logging.warning("All scraper threads are stuck on timed-out sources, starting another")
+            metrics.incr("scrape.replacement_workers")
+        start_worker()
+
+    async def run_async_job(index, pool, semaphore):
+        job = jobs[index]
+        async with semaphore:
+            started[index] = time.monotonic()
+            logging.info(f"Scraping {job.name}...")
+            try:
+                results[index] = ('ok', await asyncio.wait_for(job.run(pool), limit_for(index)))
+            except asyncio.TimeoutError:
+                results[index] = ('error', f"timed out after {limit_for(index)}s")
+            except Exception as e:
+                results[index] = ('error', e)
+            metrics.observe(f"scrape.{job.name}", time.monotonic() - started[index])
+            finished[index].set()
+
+    async def run_async_lane():
+        semaphore = asyncio.Semaphore(max_workers)
+        async with AsyncBrowserPool() as pool:
+            await asyncio.gather(*(run_async_job(i, pool, semaphore) for i in async_indexes))
+
+    def async_lane():
+        try:
+            asyncio.run(run_async_lane())
+        except Exception as e:
+            logging.error(f"Async scraper lane failed: {e}")
+            for index in async_indexes:
+                if not finished[index].is_set():
+                    results[index] = ('error', e)
+                    finished[index].set()
+
+    for _ in range(min(max_workers, len(sync_indexes))):
+        start_worker()
+    if async_indexes:
+        threading.Thread(target=async_lane, daemon=True).start()
+
+    all_items = []
+    error_log = []
+    for index, job in enumerate(jobs):
+        limit = limit_for(index)
+        while not finished[index].is_set():
+            if started[index] is None:
+                # Still queued behind other jobs; the deadline starts when it does
+                if not job.is_async:
+                    unstick()
+                finished[index].wait(0.5)
+                continue
+            remaining = limit - (time.monotonic() - started[index])
+            if remaining <= 0 or finished[index].wait(remaining):
+                break
+
+        if not finished[index].is_set():
+            msg = f"{job.error_prefix}: timed out after {limit}s"
+            logging.error(msg)
+            error_log.append(msg)
+            metrics.incr("scrape.timeouts")
+            continue
+
+        status, value = results[index]
+        if status == 'ok':
+            all_items.extend(value or [])
+        else:
+            msg = f"{job.error_prefix}: {str(value)}"
+            logging.error(msg)
+            error_log.append(msg)
+
+    return all_items, error_log
@@ -0,0 +1,99 @@
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+class AsyncBrowserPool:
+    """
+    Shares one Chromium instance between all Playwright scrapers
+    (playwright.async_api), which run as coroutines on one event loop.
+    Chromium is only launched when the first page is requested, and browser
+    contexts are cached by name so later sources reuse a warm context
+    (e.g. 'facebook' keeps its cookies, 'ncu' is a plain context).
+    """
+    def __init__(self, headless=True):
+        self.headless = headless
+        self._playwright = None
+        self._browser = None
+        self._contexts = {}
+        self._lock = asyncio.Lock()
+
+    async def _ensure_browser(self):
+        async with self._lock:
+            if self._browser is None:
+                from playwright.async_api import async_playwright
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=self.headless)
+                logging.info("Async browser pool: launched Chromium")
+        return self._browser
+
+    async def context(self, name='default', cookies=None, **context_args):
+        """
+        Returns the context called `name`, creating it on first use.
+        `cookies` and `context_args` only apply when the context is created.
+        """
+        context = self._contexts.get(name)
+        if context is None:
+            browser = await self._ensure_browser()
+            context = self._contexts.get(name)
+            if context is None:
+                context = await browser.new_context(**context_args)
+                if cookies:
+                    await context.add_cookies(cookies)
+                self._contexts[name] = context
+                logging.info(f"Async browser pool: opened context '{name}'")
+        return context
+
+    @asynccontextmanager
+    async def page(self, name='default', cookies=None, **context_args):
+        context = await self.context(name, cookies, **context_args)
+        page = await context.new_page()
+        try:
+            yield page
+        finally:
+            await page.close()
+
+    async def close(self):
+        for context in self._contexts.values():
+            try:
+                await context.close()
+            except Exception as e:
+                logging.warning(f"Async browser pool: error closing context: {e}")
+        self._contexts = {}
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+@asynccontextmanager
+async def async_browser_page(pool=None, name='default', cookies=None, **context_args):
+    """
+    Yields a page from `pool`, or from a short-lived pool when the scraper
+    is called standalone (e.g. from its own __main__ block).
+    """
+    if pool is None:
+        async with AsyncBrowserPool() as own_pool:
+            async with own_pool.page(name, cookies, **context_args) as page:
+                yield page
+    else:
+        async with pool.page(name, cookies, **context_args) as page:
+            yield page
+
+def run_async(scraper, config):
+    """
+    Runs a coroutine scraper (`async def scraper(config, pool=None)`) to completion
+    from synchronous code. Used by the sync entry points kept for backward compatibility.
+    """
+    async def _run():
+        async with AsyncBrowserPool() as pool:
+            return await scraper(config, pool=pool)
+    return asyncio.run(_run())
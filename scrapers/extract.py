@@ -0,0 +1,31 @@
+import logging
+
+# Field spec format, per field name:
+#   {'selector': 'td:nth-child(2)'}                 -> innerText of the first match ('' selector = the row itself)
+#   {'selector': 'td:nth-child(5) a', 'attr': 'href'} -> attribute of the first match
+#   {'selector': 'p', 'all': True}                  -> list of innerText of every match
+# Missing elements come back as None (or [] for 'all').
+EXTRACT_ROWS_JS = """
+(rows, fields) => rows.map(row => {
+    const out = {};
+    for (const [name, spec] of Object.entries(fields)) {
+        const value = el => spec.attr ? el.getAttribute(spec.attr) : (el.innerText || '').trim();
+        if (spec.all) {
+            out[name] = Array.from(row.querySelectorAll(spec.selector)).map(value);
+            continue;
+        }
+        const el = spec.selector ? row.querySelector(spec.selector) : row;
+        out[name] = el ? value(el) : null;
+    }
+    return out;
+})
+"""
+
+async def extract_rows(page, row_selector, fields):
+    """
+    Returns every row matching `row_selector` as a plain dict of `fields`,
+    in a single browser round trip.
+    """
+    rows = await page.locator(row_selector).evaluate_all(EXTRACT_ROWS_JS, fields)
+    logging.info(f"Extracted {len(rows)} rows for '{row_selector}'")
+    return rows
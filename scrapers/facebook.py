@@ -1,64 +1,87 @@
-from playwright.sync_api import sync_playwright
+import asyncio
 import logging
-import time
 import os
+import json
 import random
-from bs4 import BeautifulSoup
+from scrapers.browser import async_browser_page, run_async, USER_AGENT
+from scrapers.scroll import MEASURE_JS, ScrollStopper, wait_for_growth_async
+from scrapers.waits import Readiness, wait_ready_async
 
-def scrape_facebook_page(config):
+CONTEXT_ARGS = {
+    "user_agent": USER_AGENT,
+    "ignore_https_errors": True
+}
+
+# Replace the old fixed 5 s sleeps: continue as soon as posts are rendered
+PAGE_READY = Readiness('div[role="article"]', timeout=10000, legacy_delay=5, name='Facebook page posts')
+FEED_READY = Readiness('div[aria-posinset]', timeout=15000, legacy_delay=5, name='Facebook feed posts')
+
+def load_cookies(cookies_file):
+    """
+    Loads an exported cookies.json and converts it into the shape Playwright accepts.
+    Returns an empty list if the file is missing or has no usable cookies.
+    """
+    if not cookies_file or not os.path.exists(cookies_file):
+        return []
+
+    with open(cookies_file, 'r') as f:
+        cookies = json.load(f)
+
+    valid_cookies = []
+    for c in cookies:
+        # Playwright Strictness:
+        # 1. name, value, domain, path are required.
+        # 2. sameSite must be compliant or omitted.
+        # 3. expires/expirationDate should be handled carefully.
+
+        new_cookie = {
+            'name': c.get('name'),
+            'value': c.get('value'),
+            'domain': c.get('domain'),
+            'path': c.get('path', '/')
+        }
+
+        if not new_cookie['name'] or not new_cookie['value'] or not new_cookie['domain']:
+            continue
+
+        if 'expirationDate' in c:
+            new_cookie['expires'] = c['expirationDate']
+        elif 'expires' in c:
+            new_cookie['expires'] = c['expires']
+
+        # Extensions often export 'no_restriction' or lowercase 'none'.
+        if 'sameSite' in c:
+            ss = c['sameSite'].lower()
+            if ss == 'lax': new_cookie['sameSite'] = 'Lax'
+            elif ss == 'strict': new_cookie['sameSite'] = 'Strict'
+            elif ss in ('none', 'no_restriction'): new_cookie['sameSite'] = 'None'
+            # else: omit
+
+        valid_cookies.append(new_cookie)
+
+    logging.info(f"Loaded {len(valid_cookies)} valid cookies out of {len(cookies)}.")
+    return valid_cookies
+
+def facebook_page(pool, config):
+    """
+    Opens a page in the shared Facebook context (cookie-bearing when cookies.json is usable).
+    """
+    cookies = load_cookies(config['sites']['facebook'].get('cookies_file'))
+    if not cookies:
+        logging.info("No cookies found. Scraper might be limited to Public Pages only.")
+        return async_browser_page(pool, 'facebook-public', **CONTEXT_ARGS)
+    return async_browser_page(pool, 'facebook', cookies=cookies, **CONTEXT_ARGS)
+
+async def scrape_facebook_page_async(config, pool=None):
     """
     Scrapes a public Facebook page OR Group for the latest post.
     """
+    from bs4 import BeautifulSoup
     pages_list = config['sites']['facebook']['pages']
     
     posts = []
     
-    with sync_playwright() as p:
-        # Launch browser
-        browser = p.chromium.launch(headless=True)
-        
-        # Load cookies if available
-        context_args = {
-            "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "ignore_https_errors": True
-        }
-        
-        # Check for cookies file in config
-        cookies_file = config['sites']['facebook'].get('cookies_file')
-        if cookies_file and os.path.exists(cookies_file):
-            import json
-            with open(cookies_file, 'r') as f:
-                cookies = json.load(f)
-                # Fix for Playwright: sameSite must be Strict, Lax, or None. 
-                # Extensions often export 'no_restriction' or lowercase 'none'.
-                for c in cookies:
-                    if 'sameSite' in c:
-                        val = c['sameSite'].lower()
-                        if val == 'no_restriction' or val == 'unspecified':
-                            c['sameSite'] = 'None'
-                        elif val == 'lax':
-                            c['sameSite'] = 'Lax'
-                        elif val == 'strict':
-                            c['sameSite'] = 'Strict'
-                        elif val == 'none':
-                            c['sameSite'] = 'None'
-                
-                # Filter out cookies without domain or path (Playwright requirement)
-                valid_cookies = [c for c in cookies if 'domain' in c and 'path' in c and 'name' in c and 'value' in c]
-                logging.info(f"Loaded {len(valid_cookies)} valid cookies out of {len(cookies)}.")
-                
-                if valid_cookies:
-                    context = browser.new_context(**context_args)
-                    context.add_cookies(valid_cookies)
-                else:
-                    logging.warning("No valid cookies found in file. Proceeding without cookies.")
-                    context = browser.new_context(**context_args)
-        else:
-            logging.info("No cookies found. Scraper might be limited to Public Pages only.")
-            context = browser.new_context(**context_args)
-            
-        page = context.new_page()
-        
+    async with facebook_page(pool, config) as page:
         for item in pages_list:
             url = item['url']
             name = item.get('name', 'Facebook')
@@ -67,16 +90,16 @@ def scrape_facebook_page(config):
             
             try:
                 # Use domcontentloaded for faster/more resilient loading
-                page.goto(url, wait_until='domcontentloaded', timeout=45000)
+                await page.goto(url, wait_until='domcontentloaded', timeout=45000)
                 
                 # Scroll down a bit
-                page.evaluate("window.scrollBy(0, 1000)")
-                time.sleep(5) 
+                await page.evaluate("window.scrollBy(0, 1000)")
+                await wait_ready_async(page, PAGE_READY)
                 
                 # Check for login wall or content
                 # For groups, the feed is often in a specific role or div
                 
-                content = page.content()
+                content = await page.content()
                 soup = BeautifulSoup(content, 'html.parser')
                 
                 # Strategy: Look for "feed" role or articles
@@ -110,199 +133,156 @@ def scrape_facebook_page(config):
                 
             except Exception as e:
                 logging.error(f"Error scraping {name}: {e}")
-        
-        browser.close()
     
     return posts
 
-def scrape_personal_feed(config):
+def scrape_facebook_page(config):
+    """
+    Sync entry point, kept for backward compatibility.
+    """
+    return run_async(scrape_facebook_page_async, config)
+
+# Runs in the browser after every scroll: returns the feed posts
+# (div[aria-posinset]) whose posinset isn't in `seen`, already reduced to
+# plain fields, so the page HTML never has to be serialized and reparsed.
+FEED_POSTS_JS = """
+(articles, seen) => {
+    const clean = t => (t || '').replace(/\\s+/g, ' ').trim();
+    const known = new Set(seen);
+    const posts = [];
+    for (const article of articles) {
+        const posinset = article.getAttribute('aria-posinset');
+        if (known.has(posinset)) continue;
+
+        // 1. Author: first heading / strong
+        const authorTag = article.querySelector('h2, h3, h4, strong');
+        const author = authorTag ? clean(authorTag.innerText) : 'Unknown';
+
+        // 2. Message: the explicit message container, else the longest dir=auto block
+        let text = '';
+        const msg = article.querySelector('div[data-ad-preview="message"]');
+        if (msg && clean(msg.innerText).length > 5) {
+            text = clean(msg.innerText);
+        }
+        if (!text) {
+            for (const c of article.querySelectorAll('div[dir="auto"], span[dir="auto"]')) {
+                const t = clean(c.innerText);
+                if (t.length > text.length && !t.includes('Facebook') && !t.includes('Like')) text = t;
+            }
+        }
+        if (!text) text = clean(article.innerText).slice(0, 500);
+
+        // 3. Link: the timestamp permalink, else the first link
+        const anchors = Array.from(article.querySelectorAll('a[href]')).map(a => a.getAttribute('href'));
+        const link = anchors.find(h => h.includes('/posts/') || h.includes('/permalink') || h.includes('/watch/')) || anchors[0] || '';
+
+        posts.push({posinset, author, text, link});
+    }
+    return posts;
+}
+"""
+
+async def collect_feed_posts(page, seen):
+    """
+    Returns the feed posts that appeared since the last call and records their
+    posinset in `seen`. Posts still rendering (no text yet) are left for the next call.
+    """
+    posts = await page.locator('div[aria-posinset]').evaluate_all(FEED_POSTS_JS, list(seen))
+    ready = []
+    for post in posts:
+        if len(post['text']) > 10:
+            seen.add(post['posinset'])
+            ready.append(post)
+    return ready
+
+def feed_item(post, url):
+    link = post['link']
+    if link and link.startswith('/'): 
+        link = f"https://www.facebook.com{link}"
+    clean_text = post['text']
+    return {
+        'source': f"Personal Feed ({post['author']})",
+        'title': clean_text[:80] + '...',
+        'description': clean_text[:2000], # Capture MORE context for AI
+        'date': 'Just Now',
+        'link': link or url,
+        'permalink': bool(link)
+    }
+
+async def scrape_personal_feed_async(config, pool=None, is_known=None):
     """
     Scrapes the user's personal Facebook Feed ('Doom Scroll') for recommended content.
+    Posts are extracted in the browser after every scroll, so memory and
+    parse time don't grow with scroll_count. Set sites.facebook.debug to
+    also save a screenshot and the final feed HTML.
+
+    Scrolling waits for new posts instead of sleeping, and stops early once
+    feed_target posts are collected, the feed stops growing, or a whole
+    scroll only brought posts for which `is_known(item)` is true.
     """
     posts = []
-    scroll_count = config['sites']['facebook'].get('scroll_count', 15)
+    fb_config = config['sites']['facebook']
+    scroll_count = fb_config.get('scroll_count', 15)
+    debug = fb_config.get('debug', False)
+    jitter = fb_config.get('scroll_jitter', [0.5, 1.5])
     
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        
-        # Load cookies (MANDATORY for personal feed)
-        context_args = {
-            "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "ignore_https_errors": True
-        }
-        
-        cookies_file = config['sites']['facebook'].get('cookies_file')
-        if not cookies_file or not os.path.exists(cookies_file):
-            logging.error("Personal Feed requires valid cookies.json!")
-            return []
-            
-        import json
-        with open(cookies_file, 'r') as f:
-            cookies = json.load(f)
-            
-            valid_cookies = []
-            for c in cookies:
-                # Playwright Strictness:
-                # 1. name, value, domain, path are required.
-                # 2. sameSite must be compliant or omitted.
-                # 3. expires/expirationDate should be handled carefully.
-                
-                new_cookie = {
-                    'name': c.get('name'),
-                    'value': c.get('value'),
-                    'domain': c.get('domain'),
-                    'path': c.get('path', '/')
-                }
-                
-                if not new_cookie['name'] or not new_cookie['value'] or not new_cookie['domain']:
-                    continue
-                    
-                # Fix Domain: ensure it works for www.facebook.com
-                # If domain is .facebook.com, it should work. 
-                
-                if 'expirationDate' in c:
-                    new_cookie['expires'] = c['expirationDate']
-                elif 'expires' in c:
-                    new_cookie['expires'] = c['expires']
-                    
-                # Simplify sameSite: Just remove it if causing issues, or strict map
-                if 'sameSite' in c:
-                    ss = c['sameSite'].lower()
-                    if ss == 'lax': new_cookie['sameSite'] = 'Lax'
-                    elif ss == 'strict': new_cookie['sameSite'] = 'Strict'
-                    elif ss == 'none': new_cookie['sameSite'] = 'None'
-                    # else: omit
-                
-                valid_cookies.append(new_cookie)
-        
-        if not valid_cookies:
-             logging.error("No valid cookies found!")
-             return []
+    # Load cookies (MANDATORY for personal feed)
+    cookies = load_cookies(fb_config.get('cookies_file'))
+    if not cookies:
+        logging.error("Personal Feed requires valid cookies.json!")
+        return []
 
-        context = browser.new_context(**context_args)
-        try:
-            context.add_cookies(valid_cookies)
-            logging.info(f"Loaded {len(valid_cookies)} cookies.")
-        except Exception as e:
-            logging.error(f"Failed to load cookies: {e}")
-            return []
-        page = context.new_page()
-        
+    async with async_browser_page(pool, 'facebook', cookies=cookies, **CONTEXT_ARGS) as page:
         url = "https://www.facebook.com/"
-        logging.info(f"Doom Scrolling Personal Feed: {url} (Scrolls: {scroll_count})")
+        logging.info(f"Doom Scrolling Personal Feed: {url} (Scrolls: up to {scroll_count})")
         
         try:
-            page.goto(url, wait_until='domcontentloaded', timeout=60000)
-            time.sleep(5) # Wait for initial load
+            await page.goto(url, wait_until='domcontentloaded', timeout=60000)
+            await wait_ready_async(page, FEED_READY)
             
-            # DEBUG: Screenshot
-            page.screenshot(path="debug_facebook_login.png")
-            logging.info("Saved screenshot to debug_facebook_login.png")
-            
-            # Doom Scroll Loop
-            for i in range(scroll_count):
-                page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                logging.info(f"Scrolling... ({i+1}/{scroll_count})")
-                time.sleep(random.uniform(2, 4)) # Random delay to look human
+            if debug:
+                await page.screenshot(path="debug_facebook_login.png")
+                logging.info("Saved screenshot to debug_facebook_login.png")
             
-            # Extract Content
-            content = page.content()
-            
-            # DEBUG: Save HTML to inspect
-            with open("facebook_feed_debug.html", "w") as f:
-                f.write(content)
-            logging.info("Saved debug HTML to facebook_feed_debug.html")
+            seen = set()
+            posts = [feed_item(post, url) for post in await collect_feed_posts(page, seen)]
+            stopper = ScrollStopper("Personal Feed", scroll_count, target=fb_config.get('feed_target'),
+                                    patience=fb_config.get('scroll_patience', 2), is_known=is_known,
+                                    initial=len(posts))
+            size = await page.evaluate(MEASURE_JS, ['div[aria-posinset]', 'aria-posinset'])
 
-            soup = BeautifulSoup(content, 'html.parser')
-            
-            # 'div[aria-posinset]' seems more reliable for main feed
-            articles = soup.select('div[role="article"], div[aria-posinset]')
-            
-            logging.info(f"Found {len(articles)} posts in feed (role=article or aria-posinset).")
+            # Doom Scroll Loop
+            for _ in range(scroll_count):
+                await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                size = await wait_for_growth_async(page, 'div[aria-posinset]', size, attr='aria-posinset',
+                                                   timeout=fb_config.get('scroll_timeout', 8000))
+                new_posts = [feed_item(post, url) for post in await collect_feed_posts(page, seen)]
+                posts.extend(new_posts)
+                logging.info(f"Scrolling... ({stopper.scrolls + 1}/{scroll_count}), {len(new_posts)} new posts")
+                if stopper.update(new_posts):
+                    break
+                if jitter:
+                    await asyncio.sleep(random.uniform(*jitter)) # Short random pause to look human
             
-            for article in articles:
-                # 1. Extract Author
-                author = "Unknown"
-                # Authors are often in h2, h3, h4, or strong, or the first 'a' with a clear name
-                author_tag = article.select_one('h2, h3, h4, strong')
-                if author_tag:
-                    author = author_tag.get_text(strip=True)
-                
-                # 2. Extract Message Content (The actual post text)
-                message_text = ""
-                
-                # Priority 1: The explicit message container
-                msg_div = article.select_one('div[data-ad-preview="message"]')
-                if msg_div:
-                    t = msg_div.get_text(separator=' ', strip=True)
-                    if len(t) > 5:
-                        message_text = t
-                
-                # Priority 2: Heuristic (if P1 failed)
-                if not message_text:
-                    candidates = article.select('div[dir="auto"], span[dir="auto"]')
-                    best_text = ""
-                    for c in candidates:
-                        t = c.get_text(separator=' ', strip=True)
-                        if len(t) > len(best_text) and "Facebook" not in t and "Like" not in t:
-                            best_text = t
-                    message_text = best_text
-                
-                if not message_text:
-                    # Fallback: get all text
-                    message_text = article.get_text(separator=' ', strip=True)[:500]
-
-                clean_text = message_text
-                
-                # Check link (find first 'a' with href)
-                # For feed posts, the timestamp link is usually the permalink
-                link = ""
-                
-                # Try to find a link that looks like a post permalink
-                # e.g. /username/posts/..., /permalink.php, /groups/...
-                a_tags = article.find_all('a', href=True)
-                for a in a_tags:
-                    href = a['href']
-                    if '/posts/' in href or '/permalink' in href or '/watch/' in href:
-                        link = href
-                        break
-                
-                # Fallback: just take the first link
-                if not link and a_tags:
-                    link = a_tags[0]['href']
+            if debug:
+                html = await page.content()
+                with open("facebook_feed_debug.html", "w") as f:
+                    f.write(html)
+                logging.info("Saved debug HTML to facebook_feed_debug.html")
 
-                if link and link.startswith('/'): 
-                    link = f"https://www.facebook.com{link}"
-                
-                if len(clean_text) > 10: # Restore threshold
-                    posts.append({
-                        'source': f'Personal Feed ({author})',
-                        'title': clean_text[:80] + '...',
-                        'description': clean_text[:2000], # Capture MORE context for AI
-                        'date': 'Just Now',
-                        'link': link or url
-                    })
-                if author_tag:
-                    author = author_tag.get_text(strip=True)
-                
-                # Identify "Suggested for you" or similar recommendation text if possible
-                
-                if len(clean_text) > 10: # Lower threshold to catch shorter posts
-                    posts.append({
-                        'source': f'Personal Feed ({author})',
-                        'title': clean_text[:80] + '...',
-                        'description': clean_text[:2000], # Capture MORE context for AI
-                        'date': 'Just Now',
-                        'link': link or url
-                    })
+            logging.info(f"Found {len(posts)} posts in feed (aria-posinset).")
                     
         except Exception as e:
             logging.error(f"Error scrolling feed: {e}")
-            
-        browser.close()
         
     return posts
 
+def scrape_personal_feed(config):
+    """
+    Sync entry point, kept for backward compatibility.
+    """
+    return run_async(scrape_personal_feed_async, config)
+
 if __name__ == "__main__":
      # Test with specific page
     config = {
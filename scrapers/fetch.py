@@ -0,0 +1,107 @@
+import asyncio
+import logging
+
+import metrics
+from http_cache import get_cache
+from scrapers.browser import async_browser_page, USER_AGENT
+from scrapers.extract import extract_rows
+from scrapers.waits import Readiness, wait_ready_async
+
+# Per-source fetch modes:
+#   http    - plain HTTP + lxml only, never start Chromium
+#   browser - always render in Chromium
+#   auto    - try HTTP first, fall back to Chromium when the expected selectors are missing
+#   api     - call the JSON endpoint the page loads its data from, learned during
+#             an earlier Chromium run (see scrapers.netcapture); Chromium otherwise
+FETCH_MODES = ('http', 'browser', 'auto', 'api')
+
+def fetch_html(url, timeout=None):
+    # Conditional GET through the shared cache; unchanged pages cost a 304
+    return get_cache().get(url, headers={'User-Agent': USER_AGENT}, timeout=timeout).text
+
+def parse_html(html):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, 'lxml')
+
+def extract_rows_html(html, row_selector, fields):
+    """
+    Same contract as extract.extract_rows(), but on static HTML.
+    """
+    def value(el, spec):
+        if spec.get('attr'):
+            return el.get(spec['attr'])
+        return el.get_text(separator=' ', strip=True)
+
+    rows = []
+    for row in parse_html(html).select(row_selector):
+        out = {}
+        for name, spec in fields.items():
+            if spec.get('all'):
+                out[name] = [value(el, spec) for el in row.select(spec['selector'])]
+                continue
+            el = row.select_one(spec['selector']) if spec.get('selector') else row
+            out[name] = value(el, spec) if el is not None else None
+        rows.append(out)
+    return rows
+
+def get_mode(site_config, default='auto'):
+    mode = (site_config or {}).get('fetch_mode', default)
+    if mode not in FETCH_MODES:
+        logging.warning(f"Unknown fetch_mode '{mode}', using '{default}'")
+        return default
+    return mode
+
+async def fetch_page(url, from_html, from_page, mode='auto', pool=None, timeout=60000, ready=None, what='content'):
+    """
+    Runs `from_html(html)` on the static HTML of `url` when `mode` allows it,
+    and `await from_page(page)` on the page rendered in Chromium otherwise
+    (in 'auto' mode also when the static result is empty or the HTTP fetch
+    fails). `ready` is awaited before from_page. Returns (result, 'http' or 'browser').
+    """
+    if mode in ('http', 'auto'):
+        try:
+            html = await asyncio.to_thread(fetch_html, url, timeout / 1000)
+            result = from_html(html)
+            if result or mode == 'http':
+                metrics.incr('fetch.http')
+                return result, 'http'
+            logging.info(f"No {what} in static HTML of {url}, falling back to browser")
+        except Exception as e:
+            if mode == 'http':
+                raise
+            logging.warning(f"HTTP fetch failed for {url} ({e}), falling back to browser")
+
+    metrics.incr('fetch.browser')
+    async with async_browser_page(pool, 'ncu') as page:
+        await page.goto(url, timeout=timeout)
+        if ready is not None:
+            await wait_ready_async(page, ready)
+        return await from_page(page), 'browser'
+
+async def fetch_rows(url, row_selector, fields, mode='auto', pool=None, timeout=60000):
+    """
+    Returns the rows of `url` as dicts, using the cheapest fetch path `mode` allows.
+    """
+    async def from_page(page):
+        return await extract_rows(page, row_selector, fields)
+
+    rows, _ = await fetch_page(
+        url, lambda html: extract_rows_html(html, row_selector, fields), from_page, mode, pool, timeout,
+        # Rows rendered by scripts may show up after the load event
+        ready=Readiness(row_selector, timeout=15000), what=f"'{row_selector}'"
+    )
+    return rows
+
+def _html_title(html):
+    title = parse_html(html).title
+    return title.string.strip() if title and title.string else ''
+
+async def fetch_title(url, mode='auto', pool=None, timeout=60000):
+    """
+    Returns the <title> of `url`, using the cheapest fetch path `mode` allows.
+    """
+    async def from_page(page):
+        return await page.title()
+
+    title, _ = await fetch_page(url, _html_title, from_page, mode, pool, timeout, what='<title>')
+    return title
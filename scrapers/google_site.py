@@ -1,69 +1,27 @@
-
-from playwright.sync_api import sync_playwright
 import logging
+from scrapers.browser import run_async
+from scrapers.page_watch import watch_page
 
-def scrape_google_site(config):
+async def scrape_google_site_async(config, pool=None):
     """
-    Scrapes Adaptive Learning Google Site.
+    Watches the Adaptive Learning Google Site for new or changed content.
     URL: https://sites.google.com/view/adaptive2021
+    Only added or changed text blocks are reported (see scrapers.page_watch).
     """
-    url = config['sites']['google_site']['url']
+    site = config['sites']['google_site']
     data = []
-    
+
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.goto(url, timeout=60000)
-            
-            # Google Sites has dynamic class names.
-            # Best bet is to look for text content that looks like a date or "News"
-            # Or get all external links? Use a broad selector for text content under sections.
-            
-            # Strategy: Look for the specific 'News' section if identifiable, or just dump known text blocks.
-            # Based on user request, they want to track activities.
-            
-            # Let's try to find elements that contain date-like strings (e.g., "3/11") 
-            # or look for the "Latest News" header and get following siblings.
-            
-            # Broad approach: Get all text that looks like a title/event
-            # Google Sites often puts content in specific div structures.
-            # Let's target text blocks.
-            
-            blocks = page.locator("div[data-text-block='true']").all() # Common internal attribute? Maybe not.
-            
-            # Fallback: Get all text content and filter for keywords or patterns?
-            # Better: Get all links that might be events.
-            
-            # User provided: https://sites.google.com/view/adaptive2021/首頁
-            # Let's grab the page title and any text that follows "Latest News"
-            
-            # Simplistic approach for now: Get page text and summarize? 
-            # Or valid links.
-            
-            # Let's try to get all text in the main content area.
-            # Try to get content from main, else body
-            try:
-                content_text = page.locator("main").inner_text(timeout=5000)
-            except:
-                content_text = page.locator("body").inner_text()
-            
-            # This is too unstructured. Let's return a single entry checking if the page changed?
-            # Or just scrape the first few "lines" that look like events.
-            
-            # Let's assume we want to know if there's new content.
-            # We'll grab the first 5 text blocks that are not headers.
-            
-            data.append({
-                "title": f"Google Site Check: {page.title()}",
-                "url": url,
-                "date": "Check Link",
-                "source": "Google Site"
-            })
-            
-            browser.close()
-            
+        # Google Sites are server-rendered, so the text is normally in the static HTML
+        # and Chromium is only needed when fetch_mode is 'browser' (or the HTTP path fails).
+        data = await watch_page(site['url'], site.get('source', "Google Site"), site, pool)
     except Exception as e:
         logging.error(f"Error scraping Google Site: {e}")
-        
+
     return data
+
+def scrape_google_site(config):
+    """
+    Sync entry point, kept for backward compatibility.
+    """
+    return run_async(scrape_google_site_async, config)
@@ -1,20 +1,27 @@
 
-import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
 import logging
+from http_cache import get_cache
 
-def scrape_kocpc(url):
+def scrape_kocpc(url, cache=None):
     """
     Scrapes the latest articles from Computer King Ada (https://www.kocpc.com.tw/).
+    Uses a conditional GET; when the page is unchanged the cached item list is reused.
     """
+    cache = cache or get_cache()
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
     
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+        response = cache.get(url, headers=headers)
+        if response.not_modified:
+            cached = cache.cached_items(url)
+            if cached is not None:
+                logging.info(f"KOCPC unchanged, reusing {len(cached)} cached items")
+                return cached
+
         soup = BeautifulSoup(response.text, 'html.parser')
         
         items = []
@@ -54,6 +61,7 @@ def scrape_kocpc(url):
                     'source': 'Computer King Ada (電腦王阿達)',
                     'title': title,
                     'link': link,
+                    'permalink': True,
                     'date': date_str,
                     'description': description
                 })
@@ -62,6 +70,7 @@ def scrape_kocpc(url):
                 logging.error(f"Error parsing KOCPC article: {e}")
                 continue
                 
+        cache.store_items(url, items)
         return items
 
     except Exception as e:
@@ -1,64 +1,101 @@
 
-from playwright.sync_api import sync_playwright
+import asyncio
 import logging
 import datetime
+from scrapers.browser import AsyncBrowserPool, async_browser_page, run_async
+from scrapers.fetch import get_mode
+from scrapers.netcapture import Recorder, learn, replay_async
+from scrapers.waits import Readiness, wait_ready_async
 
-def scrape_ncu_career(config):
+READY = Readiness(".list-item-row", timeout=15000, name='NCU Career rows')
+
+async def scrape_career_list(url, pool=None, mode='browser', site=None):
+    """
+    Scrapes one NCU Career Center list page (activities, news, extra-event, internship).
+    In 'api' mode the page's JSON endpoint is replayed when known (see scrapers.netcapture).
+    """
+    if mode == 'api':
+        items = await replay_async(url, site)
+        if items is not None:
+            return items[:10]
+
+    data = []
+    responses = []
+    async with async_browser_page(pool, 'ncu') as page:
+        recorder = Recorder(page) if mode == 'api' else None
+        logging.info(f"Scraping NCU Career: {url}")
+        await page.goto(url, timeout=60000)
+        await wait_ready_async(page, READY)
+
+        rows = await page.locator(".list-item-row").all()
+        for row in rows[:10]: # Limit to top 10 per page
+            try:
+                texts = await row.locator("p").all_inner_texts()
+                if len(texts) >= 3:
+                    date_str = texts[0].strip()
+                    # Use URL path to determine text structure precisely
+                    url_path = url.split('/')[-1]
+
+                    if url_path == 'activities':
+                        # activities: Start Date [0], End Date [1], Title [2]
+                        title = texts[2].strip().split('\n')[0] if len(texts) > 2 else "No Title"
+                    else:
+                        # news, extra-event, internship: Post Date [0], Title [1], Clicks [2]
+                        title = texts[1].strip().split('\n')[0] if len(texts) > 1 else "No Title"
+
+                    link_element = row.locator("..") # Parent is the <a> tag
+                    link = await link_element.get_attribute("href")
+
+                    target_url = link
+                    if link and not link.startswith("http"):
+                       target_url = f"https://careercenter.ncu.edu.tw{link}"
+
+                    data.append({
+                        "title": title,
+                        "url": target_url,
+                        "permalink": bool(link),
+                        "date": date_str,
+                        "source": f"NCU Career Center ({url.split('/')[-1]})"
+                    })
+            except Exception as e:
+                logging.error(f"Error parsing career row: {e}")
+                continue
+
+        if recorder is not None:
+            responses = await recorder.finish()
+
+    if responses:
+        learn(url, responses, data)
+    return data
+
+async def scrape_ncu_career_async(config, pool=None):
     """
     Scrapes NCU Career Center activities.
     URL: https://careercenter.ncu.edu.tw/activities
+    The list pages are loaded concurrently, each in its own tab.
     """
+    if pool is None:
+        async with AsyncBrowserPool() as own_pool:
+            return await scrape_ncu_career_async(config, pool=own_pool)
+
+    site = config['sites']['ncu_career']
     # Handle both single URL (old config) and list of URLs (new config)
-    urls = config['sites']['ncu_career'].get('urls', [config['sites']['ncu_career'].get('url')])
+    urls = site.get('urls', [site.get('url')])
+    urls = [u for u in urls if u]
+    mode = get_mode(site, 'browser')
     data = []
-    
-    try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context()
-            page = context.new_page()
-            
-            for url in urls:
-                if not url: continue
-                logging.info(f"Scraping NCU Career: {url}")
-                page.goto(url, timeout=60000)
-                
-                rows = page.locator(".list-item-row").all()
-                for row in rows[:10]: # Limit to top 10 per page
-                    try:
-                        texts = row.locator("p").all_inner_texts()
-                        if len(texts) >= 3:
-                            date_str = texts[0].strip()
-                            # Use URL path to determine text structure precisely
-                            url_path = url.split('/')[-1]
-                            
-                            if url_path == 'activities':
-                                # activities: Start Date [0], End Date [1], Title [2]
-                                title = texts[2].strip().split('\n')[0] if len(texts) > 2 else "No Title"
-                            else:
-                                # news, extra-event, internship: Post Date [0], Title [1], Clicks [2]
-                                title = texts[1].strip().split('\n')[0] if len(texts) > 1 else "No Title"
-                                
-                            link_element = row.locator("..") # Parent is the <a> tag
-                            link = link_element.get_attribute("href")
-                            
-                            target_url = link
-                            if link and not link.startswith("http"):
-                               target_url = f"https://careercenter.ncu.edu.tw{link}"
-    
-                            data.append({
-                                "title": title,
-                                "url": target_url,
-                                "date": date_str,
-                                "source": f"NCU Career Center ({url.split('/')[-1]})"
-                            })
-                    except Exception as e:
-                        logging.error(f"Error parsing career row: {e}")
-                        continue
-            
-            browser.close()
-            
-    except Exception as e:
-        logging.error(f"Error scraping NCU Career: {e}")
-        
+
+    results = await asyncio.gather(*(scrape_career_list(url, pool, mode, site) for url in urls), return_exceptions=True)
+    for url, result in zip(urls, results):
+        if isinstance(result, Exception):
+            logging.error(f"Error scraping NCU Career ({url}): {result}")
+            continue
+        data.extend(result)
+
     return data
+
+def scrape_ncu_career(config):
+    """
+    Sync entry point, kept for backward compatibility.
+    """
+    return run_async(scrape_ncu_career_async, config)
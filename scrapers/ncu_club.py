@@ -1,63 +1,71 @@
-from playwright.sync_api import sync_playwright
 import logging
 import re
+from scrapers.browser import run_async
+from scrapers.fetch import fetch_rows, get_mode
 
-def scrape_ncu_club(config):
+# The page has a calendar table and an announcements table. Both are "table tbody tr".
+ROW_SELECTOR = "table tbody tr"
+FIELDS = {
+    'date': {'selector': 'td:nth-child(2)'},
+    'title': {'selector': 'td:nth-child(4)'},
+    'link': {'selector': 'td:nth-child(5) a', 'attr': 'href'},
+}
+
+def parse_rows(rows, url):
+    """
+    Turns extracted rows into items. Pure Python, no browser calls.
+    """
+    data = []
+    for row in rows:
+        try:
+            date_str = (row.get('date') or '').strip()
+
+            # Ensure the date string is a full YYYY-MM-DD date to skip calendar rows and headers
+            if not re.match(r'^\d{4}-\d{2}-\d{2}$', date_str):
+                continue
+
+            title = (row.get('title') or '').strip()
+            if not title: continue
+
+            target_url = url # Default to the page itself if no attachment
+            link = row.get('link')
+            if link and not link.startswith("http"):
+               target_url = f"https://club.adm.ncu.edu.tw{link}"
+            elif link:
+               target_url = link
+
+            data.append({
+                "title": title,
+                "url": target_url,
+                "permalink": bool(link),
+                "date": date_str,
+                "source": "NCU Club Announcements"
+            })
+        except Exception as e:
+            logging.error(f"Error parsing NCU Club row: {e}")
+            continue
+    return data
+
+async def scrape_ncu_club_async(config, pool=None):
     """
     Scrapes NCU Club Official Announcements.
     """
-    url = config['sites']['ncu_club']['url']
+    site = config['sites']['ncu_club']
+    url = site['url']
     data = []
-    
+
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            logging.info(f"Scraping NCU Club: {url}")
-            page.goto(url, timeout=60000)
-            
-            # The page has a calendar table and an announcements table. Both are "table tbody tr".
-            rows = page.locator("table tbody tr").all()
-            
-            for row in rows: 
-                try:
-                    # Date: td:nth-child(2)
-                    date_locator = row.locator("td:nth-child(2)")
-                    if date_locator.count() == 0: continue
-                    date_str = date_locator.inner_text().strip()
-                    
-                    # Ensure the date string is a full YYYY-MM-DD date to skip calendar rows and headers
-                    if not re.match(r'^\d{4}-\d{2}-\d{2}$', date_str):
-                        continue
-                    
-                    # Title: td:nth-child(4)
-                    title = row.locator("td:nth-child(4)").inner_text().strip()
-                    if not title: continue
-                    
-                    # Links: td:nth-child(5) a
-                    link_locator = row.locator("td:nth-child(5) a").first
-                    target_url = url # Default to the page itself if no attachment
-                    
-                    if link_locator.count() > 0:
-                        link = link_locator.get_attribute("href")
-                        if link and not link.startswith("http"):
-                           target_url = f"https://club.adm.ncu.edu.tw{link}"
-                        elif link:
-                           target_url = link
-
-                    data.append({
-                        "title": title,
-                        "url": target_url,
-                        "date": date_str,
-                        "source": "NCU Club Announcements"
-                    })
-                except Exception as e:
-                    logging.error(f"Error parsing NCU Club row: {e}")
-                    continue
-            
-            browser.close()
-            
+        logging.info(f"Scraping NCU Club: {url}")
+        rows = await fetch_rows(url, ROW_SELECTOR, FIELDS, get_mode(site), pool)
+        data = parse_rows(rows, url)
+
     except Exception as e:
         logging.error(f"Error scraping NCU Club: {e}")
-        
+
     return data
+
+def scrape_ncu_club(config):
+    """
+    Sync entry point, kept for backward compatibility.
+    """
+    return run_async(scrape_ncu_club_async, config)
@@ -1,52 +1,67 @@
-from playwright.sync_api import sync_playwright
 import logging
+from scrapers.browser import run_async
+from scrapers.fetch import fetch_rows, get_mode
 
-def scrape_ncu_finance(config):
+# Selector from browser subagent: table.form_table tbody tr
+ROW_SELECTOR = "table.form_table tbody tr"
+FIELDS = {
+    # Title and URL are in td:nth-child(2) a
+    'title': {'selector': 'td:nth-child(2) a'},
+    'link': {'selector': 'td:nth-child(2) a', 'attr': 'href'},
+    # Date is in td:nth-child(3)
+    'date': {'selector': 'td:nth-child(3)'},
+}
+
+def parse_rows(rows):
+    """
+    Turns extracted rows into items. Pure Python, no browser calls.
+    """
+    data = []
+    for row in rows[:10]: # Limit to top 10
+        try:
+            if row.get('title') is None:
+                continue
+            title = row['title'].strip()
+            link = row.get('link')
+            date_str = (row.get('date') or '').strip()
+
+            target_url = link
+            if link and not link.startswith("http"):
+               # Handle relative URLs. Assuming base is fm.mgt.ncu.edu.tw
+               target_url = f"https://fm.mgt.ncu.edu.tw{link}"
+
+            data.append({
+                "title": title,
+                "url": target_url,
+                "permalink": bool(link),
+                "date": date_str,
+                "source": "NCU Finance Department"
+            })
+        except Exception as e:
+            logging.error(f"Error parsing NCU Finance row: {e}")
+            continue
+    return data
+
+async def scrape_ncu_finance_async(config, pool=None):
     """
     Scrapes NCU Finance Department News.
     """
-    url = config['sites']['ncu_finance']['url']
+    site = config['sites']['ncu_finance']
+    url = site['url']
     data = []
-    
+
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            logging.info(f"Scraping NCU Finance: {url}")
-            page.goto(url, timeout=60000)
-            
-            # Selector from browser subagent: table.form_table tbody tr
-            rows = page.locator("table.form_table tbody tr").all()
-            
-            for row in rows[:10]: # Limit to top 10
-                try:
-                    # Title and URL are in td:nth-child(2) a
-                    link_locator = row.locator("td:nth-child(2) a")
-                    if link_locator.count() > 0:
-                        title = link_locator.inner_text().strip()
-                        link = link_locator.get_attribute("href")
-                        
-                        # Date is in td:nth-child(3)
-                        date_str = row.locator("td:nth-child(3)").inner_text().strip()
-                        
-                        target_url = link
-                        if link and not link.startswith("http"):
-                           # Handle relative URLs. Assuming base is fm.mgt.ncu.edu.tw
-                           target_url = f"https://fm.mgt.ncu.edu.tw{link}"
-
-                        data.append({
-                            "title": title,
-                            "url": target_url,
-                            "date": date_str,
-                            "source": "NCU Finance Department"
-                        })
-                except Exception as e:
-                    logging.error(f"Error parsing NCU Finance row: {e}")
-                    continue
-            
-            browser.close()
-            
+        logging.info(f"Scraping NCU Finance: {url}")
+        rows = await fetch_rows(url, ROW_SELECTOR, FIELDS, get_mode(site), pool)
+        data = parse_rows(rows)
+
     except Exception as e:
         logging.error(f"Error scraping NCU Finance: {e}")
-        
+
     return data
+
+def scrape_ncu_finance(config):
+    """
+    Sync entry point, kept for backward compatibility.
+    """
+    return run_async(scrape_ncu_finance_async, config)
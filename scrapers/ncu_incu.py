@@ -1,61 +1,93 @@
-
-from playwright.sync_api import sync_playwright
 import logging
+from scrapers.browser import async_browser_page, run_async
+from scrapers.extract import extract_rows
+from scrapers.fetch import get_mode
+from scrapers.netcapture import Recorder, learn, replay_async
+from scrapers.scroll import ScrollStopper, wait_for_growth_async
+from scrapers.waits import Readiness, wait_ready_async
 
-def scrape_ncu_incu(config):
+CARD_SELECTOR = ".card.rounded-3.my-4"
+FIELDS = {
+    'title': {'selector': '.card-title'},
+    'href': {'selector': '.card-title a', 'attr': 'href'},
+    'status': {'selector': '.badge'},
+}
+MAX_ITEMS = 30
+READY = Readiness(CARD_SELECTOR, timeout=15000, name='iNCU cards')
+
+def parse_card(row, url):
+    title = (row['title'] or '').strip()
+    href = row['href']
+    if href:
+        full_url = f"https://cis.ncu.edu.tw{href}" if href.startswith("/") else href
+    else:
+        full_url = url # Fallback
+    status = (row['status'] or '').strip() or "Unknown"
+    return {
+        "title": f"[{status}] {title}",
+        "url": full_url,
+        "permalink": bool(href),
+        "date": "See Details",
+        "source": "iNCU"
+    }
+
+async def scrape_ncu_incu_async(config, pool=None, is_known=None):
     """
     Scrapes iNCU Activity Query.
     URL: https://cis.ncu.edu.tw/iNCU/publicService/activityQuery
+
+    Scrolls until MAX_ITEMS cards are loaded, no more cards appear, or a
+    scroll only brings cards for which `is_known(item)` is true
+    (sites.ncu_incu.scroll_count caps the number of scrolls).
+    With fetch_mode 'api' the JSON endpoint behind the cards is called
+    instead, once a browser run has learned it.
     """
-    url = config['sites']['ncu_incu']['url']
+    site = config['sites']['ncu_incu']
+    url = site['url']
+    mode = get_mode(site, 'browser')
     data = []
-    
+    responses = []
+
+    if mode == 'api':
+        items = await replay_async(url, site)
+        if items is not None:
+            return items[:MAX_ITEMS]
+
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
+        async with async_browser_page(pool, 'ncu') as page:
+            recorder = Recorder(page) if mode == 'api' else None
             # iNCU can be slow, giving it more time
-            page.goto(url, timeout=90000)
-            
-            # Scroll down multiple times to load more events
+            await page.goto(url, timeout=90000)
+            await wait_ready_async(page, READY)
+
+            data = [parse_card(row, url) for row in await extract_rows(page, CARD_SELECTOR, FIELDS)]
+
+            # Scroll down to load more events
             # The site might not be in chronological order, so we need to fetch more.
-            for _ in range(5): # Scroll 5 times
-                page.mouse.wheel(0, 3000)
-                page.wait_for_timeout(1000) # Wait for load
-
-            cards = page.locator(".card.rounded-3.my-4").all()
-            
-            # Increased limit since we are scrolling for more
-            for card in cards[:30]: 
-                try:
-                    title_el = card.locator(".card-title")
-                    title = title_el.inner_text().strip()
-                    
-                    # Link usually on the title element or a child 'a'
-                    link_el = title_el.locator("a").first
-                    if link_el.count() > 0:
-                        href = link_el.get_attribute("href")
-                        full_url = f"https://cis.ncu.edu.tw{href}" if href.startswith("/") else href
-                    else:
-                        full_url = url # Fallback
-                        
-                    # Status badge
-                    badge = card.locator(".badge").first
-                    status = badge.inner_text().strip() if badge.count() > 0 else "Unknown"
-                    
-                    data.append({
-                        "title": f"[{status}] {title}",
-                        "url": full_url,
-                        "date": "See Details",
-                        "source": "iNCU"
-                    })
-                except Exception as e:
-                    logging.error(f"Error parsing iNCU card: {e}")
-                    continue
-            
-            browser.close()
-            
+            scroll_count = site.get('scroll_count', 5)
+            stopper = ScrollStopper("iNCU", scroll_count, target=MAX_ITEMS, is_known=is_known, initial=len(data))
+            for _ in range(scroll_count if len(data) < MAX_ITEMS else 0):
+                await page.mouse.wheel(0, 3000)
+                await wait_for_growth_async(page, CARD_SELECTOR, len(data), timeout=site.get('scroll_timeout', 5000))
+                rows = await extract_rows(page, CARD_SELECTOR, FIELDS)
+                new_items = [parse_card(row, url) for row in rows[len(data):]]
+                data.extend(new_items)
+                if stopper.update(new_items):
+                    break
+
+            if recorder is not None:
+                responses = await recorder.finish()
+
     except Exception as e:
         logging.error(f"Error scraping iNCU: {e}")
-        
-    return data
+
+    if responses:
+        learn(url, responses, data[:MAX_ITEMS])
+
+    return data[:MAX_ITEMS]
+
+def scrape_ncu_incu(config):
+    """
+    Sync entry point, kept for backward compatibility.
+    """
+    return run_async(scrape_ncu_incu_async, config)
@@ -0,0 +1,387 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import metrics
+from scrapers.browser import USER_AGENT
+
+# Network capture ("api" fetch mode): while a page renders in Chromium, the
+# JSON responses of its XHR/fetch calls are recorded. If one of them holds
+# the items the scraper extracted from the DOM, the endpoint and a field
+# mapping are kept in .cache/endpoints.json, and later runs call it with the
+# shared HTTP session instead of starting the browser.
+
+DEFAULT_STORE_PATH = os.path.join('.cache', 'endpoints.json')
+DEFAULT_MAX_AGE_DAYS = 7 # re-learn from a browser run after this
+MAX_BODY_BYTES = 2 * 1024 * 1024
+REPLAY_TIMEOUT = 30
+# Date formats tried when a DOM field is a date rendered from a JSON value
+DATE_FORMATS = ('%Y-%m-%d', '%Y/%m/%d', '%Y.%m.%d', '%Y-%m-%d %H:%M', '%Y/%m/%d %H:%M')
+DATE_LIKE = re.compile(r'^\d{4}[-/.]\d{2}[-/.]\d{2}( \d{2}:\d{2})?$')
+PLACEHOLDER = re.compile(r'\{\{|\}\}|\{([^{}:]+)(?::([^{}]+))?\}')
+
+class ReplayError(Exception):
+    pass
+
+class EndpointStore:
+    """
+    Learned endpoints per page URL:
+    {'requests': [{'method', 'url', 'data'}], 'items': [path keys],
+     'fields': {item field: template}, 'learned': timestamp}
+    """
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._data = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._data is None:
+            self._data = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        self._data = json.load(f)
+                except (OSError, ValueError) as e:
+                    logging.warning(f"Ignoring unreadable endpoint store {self.path}: {e}")
+        return self._data
+
+    def get(self, page_url):
+        with self._lock:
+            return self._load().get(page_url)
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def put(self, page_url, endpoint):
+        with self._lock:
+            self._load()[page_url] = endpoint
+            self._save()
+
+    def forget(self, page_url):
+        with self._lock:
+            if self._load().pop(page_url, None) is not None:
+                self._save()
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EndpointStore()
+        return _store
+
+class Recorder:
+    """
+    Collects the JSON bodies of XHR/fetch responses of one (async) page.
+    Attach before page.goto(), call `await finish()` before learn().
+    """
+    def __init__(self, page):
+        self.responses = []
+        self._tasks = []
+        page.on('response', self._on_response)
+
+    def _on_response(self, response):
+        request = response.request
+        if request.resource_type not in ('xhr', 'fetch') or response.status != 200:
+            return
+        if 'json' not in response.headers.get('content-type', ''):
+            return
+        self._tasks.append(asyncio.ensure_future(self._read(response, request)))
+
+    async def _read(self, response, request):
+        try:
+            body = await response.body()
+            if len(body) > MAX_BODY_BYTES:
+                return
+            self.responses.append({
+                'method': request.method,
+                'url': response.url,
+                'data': request.post_data,
+                'body': json.loads(body)
+            })
+        except Exception as e:
+            # Bodies of responses from closed pages or redirects are unavailable
+            logging.debug(f"Network capture: skipped {response.url}: {e}")
+
+    async def finish(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        return self.responses
+
+def flatten(obj, prefix=''):
+    """
+    {'a': {'b': 1}, 'c': 'x'} -> {'a.b': '1', 'c': 'x'}; lists are skipped.
+    """
+    out = {}
+    for key, value in obj.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            out.update(flatten(value, name + '.'))
+        elif isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            out[name] = str(value).strip()
+    return out
+
+def find_lists(obj, path=()):
+    """
+    Yields (path, list) for every list of objects inside a JSON document.
+    """
+    if isinstance(obj, list):
+        if obj and all(isinstance(entry, dict) for entry in obj):
+            yield list(path), obj
+        return
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            yield from find_lists(value, path + (key,))
+
+def get_path(obj, path):
+    for key in path:
+        if not isinstance(obj, dict) or key not in obj:
+            raise ReplayError(f"missing '{'.'.join(path)}' in response")
+        obj = obj[key]
+    if not isinstance(obj, list):
+        raise ReplayError(f"'{'.'.join(path)}' is not a list")
+    return obj
+
+def _escape(text):
+    return text.replace('{', '{{').replace('}', '}}')
+
+def _parse_date(value):
+    if re.fullmatch(r'\d{12,13}', value):
+        return datetime.fromtimestamp(int(value) / 1000, timezone.utc)
+    if re.fullmatch(r'\d{9,10}', value):
+        return datetime.fromtimestamp(int(value), timezone.utc)
+    return datetime.fromisoformat(value.replace('Z', '+00:00').replace('/', '-')[:19])
+
+def render(template, flat):
+    """
+    Fills "{key}" / "{key:strftime format}" placeholders from a flattened
+    JSON object. Returns None when a key is missing.
+    """
+    missing = []
+
+    def substitute(match):
+        if match.group(0) in ('{{', '}}'):
+            return match.group(0)[0]
+        key, date_format = match.groups()
+        if key not in flat:
+            missing.append(key)
+            return ''
+        if date_format:
+            try:
+                return _parse_date(flat[key]).strftime(date_format)
+            except ValueError:
+                missing.append(key)
+                return ''
+        return flat[key]
+
+    text = PLACEHOLDER.sub(substitute, template)
+    return None if missing else text
+
+def derive_template(text, flat):
+    """
+    Rewrites a DOM value as a template over a JSON object's values, e.g.
+    "[報名中] Workshop" -> "[{statusName}] {title}". Longer values are
+    substituted first; very short ones only when they are the whole value.
+    """
+    if DATE_LIKE.match(text):
+        for key, value in flat.items():
+            for date_format in DATE_FORMATS:
+                template = f"{{{key}:{date_format}}}"
+                if render(template, {key: value}) == text:
+                    return template
+
+    candidates = sorted(
+        ((key, value) for key, value in flat.items()
+         if value and (value == text or len(value) >= (3 if value.isdigit() else 2))),
+        key=lambda pair: len(pair[1]), reverse=True
+    )
+    parts = [text]
+    for key, value in candidates:
+        replaced = []
+        for part in parts:
+            if isinstance(part, tuple) or value not in part:
+                replaced.append(part)
+                continue
+            pieces = part.split(value)
+            for i, piece in enumerate(pieces):
+                if i:
+                    replaced.append((key,))
+                if piece:
+                    replaced.append(piece)
+        parts = replaced
+    return ''.join(f"{{{part[0]}}}" if isinstance(part, tuple) else _escape(part) for part in parts)
+
+def _best_match(title, flats):
+    """
+    The JSON object sharing the most text with a DOM title.
+    """
+    best, best_score = None, 0
+    for flat in flats:
+        score = sum(len(value) for value in flat.values() if len(value) >= 2 and value in title)
+        if score > best_score:
+            best, best_score = flat, score
+    return best
+
+def learn_mapping(entries, items, fields):
+    """
+    Derives {field: template} so that rendering `entries` (JSON objects)
+    reproduces the DOM `items`. Each field gets the template most items
+    agree on. Returns (mapping, number of items reproduced).
+    """
+    flats = [flatten(entry) for entry in entries]
+    votes = {field: Counter() for field in fields}
+    for item in items:
+        flat = _best_match(item.get('title') or '', flats)
+        if flat is None:
+            continue
+        for field in fields:
+            votes[field][derive_template(str(item.get(field) or ''), flat)] += 1
+    if not all(votes.values()):
+        return None, 0
+    mapping = {field: votes[field].most_common(1)[0][0] for field in fields}
+    return mapping, len(_reproduced(mapping, flats, items))
+
+def _reproduced(mapping, flats, items):
+    wanted = {tuple(str(item.get(field) or '') for field in mapping) for item in items}
+    rendered = set()
+    for flat in flats:
+        values = tuple(render(mapping[field], flat) for field in mapping)
+        if values in wanted:
+            rendered.add(values)
+    return rendered
+
+def _endpoint_key(response):
+    parts = urlsplit(response['url'])
+    return (response['method'], parts.netloc, parts.path)
+
+def learn(page_url, responses, items, store=None):
+    """
+    Finds the captured response whose list reproduces most of the DOM `items`
+    and stores its endpoint. Other responses from the same endpoint with the
+    same list (e.g. further pages loaded while scrolling) are replayed too.
+    Every text field of the items gets a template (constant fields a literal
+    one). Returns True if an endpoint was learned.
+    """
+    store = store or get_store()
+    if not items or not responses:
+        return False
+    fields = [field for field, value in items[0].items() if not isinstance(value, bool)]
+    best = None
+    for response in responses:
+        for path, entries in find_lists(response['body']):
+            mapping, count = learn_mapping(entries, items, fields)
+            if mapping and (best is None or count > best[3]):
+                best = (response, path, mapping, count)
+
+    # At least half of what the page showed must come out of the endpoint
+    if best is None or best[3] * 2 < len(items):
+        logging.info(f"Network capture: no endpoint reproduces the items of {page_url} "
+                     f"({len(responses)} JSON responses)")
+        return False
+
+    response, path, mapping, _ = best
+    requests, covered = [], set()
+    for other in responses:
+        if _endpoint_key(other) != _endpoint_key(response):
+            continue
+        try:
+            entries = get_path(other['body'], path)
+        except ReplayError:
+            continue
+        found = _reproduced(mapping, [flatten(entry) for entry in entries], items)
+        if found - covered:
+            covered |= found
+            requests.append({'method': other['method'], 'url': other['url'], 'data': other['data']})
+
+    store.put(page_url, {'requests': requests, 'items': path, 'fields': mapping, 'learned': int(time.time())})
+    metrics.incr('netcapture.learned')
+    logging.info(f"Network capture: {page_url} -> {len(requests)} request(s) to {response['url']} "
+                 f"({len(covered)}/{len(items)} items reproduced)")
+    return True
+
+def get_endpoint(page_url, site=None, store=None):
+    """
+    The endpoint to replay for `page_url`: sites.<name>.api_endpoints[page_url]
+    if configured, else a learned one that is not older than api_max_age_days.
+    """
+    site = site or {}
+    configured = (site.get('api_endpoints') or {}).get(page_url)
+    if configured:
+        endpoint = {'requests': [{'method': configured.get('method', 'GET'), 'url': configured['url'],
+                                  'data': configured.get('data')}],
+                    'items': [key for key in str(configured.get('items', '')).split('.') if key],
+                    'fields': configured['fields']}
+        return endpoint, True
+    endpoint = (store or get_store()).get(page_url)
+    max_age = site.get('api_max_age_days', DEFAULT_MAX_AGE_DAYS)
+    if endpoint and time.time() - endpoint.get('learned', 0) > max_age * 86400:
+        logging.info(f"Network capture: endpoint of {page_url} is older than {max_age} days, re-learning")
+        return None, False
+    return endpoint, False
+
+def replay(page_url, site=None, store=None):
+    """
+    Calls the endpoint(s) known for `page_url` and returns the rendered items,
+    or None when there is nothing usable to replay. A learned endpoint that
+    stops working is forgotten, so the next browser run learns it again.
+    """
+    from http_client import get_session
+    store = store or get_store()
+    endpoint, configured = get_endpoint(page_url, site, store)
+    if not endpoint:
+        return None
+
+    items, seen = [], set()
+    try:
+        session = get_session()
+        for request in endpoint['requests']:
+            response = session.request(
+                request['method'], request['url'], data=request.get('data'), timeout=REPLAY_TIMEOUT,
+                headers={'User-Agent': USER_AGENT, 'Accept': 'application/json', 'Referer': page_url,
+                         'X-Requested-With': 'XMLHttpRequest'}
+            )
+            if response.status_code != 200:
+                raise ReplayError(f"HTTP {response.status_code} from {request['url']}")
+            try:
+                body = response.json()
+            except ValueError:
+                raise ReplayError(f"non-JSON response from {request['url']}")
+            for entry in get_path(body, endpoint['items']):
+                flat = flatten(entry)
+                item = {field: render(template, flat) for field, template in endpoint['fields'].items()}
+                if any(value is None for value in item.values()):
+                    raise ReplayError("response no longer matches the field mapping")
+                # Only a URL built from the entry is the item's own page (see history_store.fingerprint)
+                item['permalink'] = bool(PLACEHOLDER.search(endpoint['fields'].get('url', '').replace('{{', '')))
+                key = (item.get('title'), item.get('url'))
+                if key not in seen:
+                    seen.add(key)
+                    items.append(item)
+        if not items:
+            raise ReplayError("no items")
+    except Exception as e:
+        metrics.incr('netcapture.failed')
+        logging.warning(f"Network capture: replay for {page_url} failed ({e}), using the browser")
+        if not configured:
+            store.forget(page_url)
+        return None
+
+    metrics.incr('netcapture.replayed')
+    logging.info(f"Network capture: {len(items)} items for {page_url} from {len(endpoint['requests'])} JSON request(s)")
+    return items
+
+async def replay_async(page_url, site=None, store=None):
+    return await asyncio.to_thread(replay, page_url, site, store)
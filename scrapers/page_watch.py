@@ -0,0 +1,160 @@
+import difflib
+import hashlib
+import logging
+import os
+import re
+import time
+from datetime import datetime
+
+import metrics
+from scrapers.fetch import fetch_page, get_mode, parse_html
+from scrapers.state import PendingState
+from scrapers.waits import Readiness
+
+# Change detection for pages without a feed or list structure. Each watched
+# page is reduced to its text blocks (paragraphs, list items, headings...);
+# per URL we keep a fingerprint of the whole text plus a hash and a short
+# snippet per block. An unchanged page costs one fingerprint comparison;
+# otherwise the block hash lists are diffed and every run of added or changed
+# blocks becomes one item.
+
+DEFAULT_STATE_PATH = os.path.join('.cache', 'page_watch.json')
+DEFAULT_SELECTOR = 'main'
+DEFAULT_MAX_ITEMS = 5
+SNIPPET_CHARS = 200
+DESCRIPTION_CHARS = 600
+BLOCK_TAGS = ('p', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'tr', 'div', 'section', 'article',
+              'blockquote', 'pre', 'dt', 'dd', 'figcaption', 'br')
+# Lines that change without the content changing
+DEFAULT_IGNORE = (r'^Page updated\b', r'^Last (updated|edited)\b', r'^\d+\s*(views?|次瀏覽)$')
+
+# page URL -> snapshot(); committed after the report went out, like the feed state
+_state = PendingState(DEFAULT_STATE_PATH)
+
+def get_state():
+    return _state
+
+def commit_state():
+    _state.commit()
+
+def block_hash(block):
+    return hashlib.blake2b(block.encode('utf-8'), digest_size=8).hexdigest()
+
+def split_blocks(text, ignore=()):
+    """
+    Normalized, non-trivial text blocks of a page, one per line of its text.
+    """
+    patterns = [re.compile(pattern, re.IGNORECASE) for pattern in (*DEFAULT_IGNORE, *ignore)]
+    blocks = []
+    for line in text.splitlines():
+        block = ' '.join(line.split())
+        if len(block) < 2 or any(pattern.search(block) for pattern in patterns):
+            continue
+        blocks.append(block)
+    return blocks
+
+def snapshot(blocks, mode):
+    hashes = [block_hash(block) for block in blocks]
+    return {
+        'fingerprint': block_hash('\n'.join(hashes)),
+        'blocks': hashes,
+        'snippets': [block[:SNIPPET_CHARS] for block in blocks],
+        'mode': mode,
+        'checked': int(time.time())
+    }
+
+def diff_blocks(old, new):
+    """
+    Compares two snapshots' block hash lists. Returns [(kind, old snippets,
+    new snippets)] for each run of 'added' or 'changed' blocks; removals are
+    not reported.
+    """
+    matcher = difflib.SequenceMatcher(None, old['blocks'], new['blocks'], autojunk=False)
+    changes = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'insert':
+            changes.append(('added', [], new['snippets'][j1:j2]))
+        elif tag == 'replace':
+            changes.append(('changed', old['snippets'][i1:i2], new['snippets'][j1:j2]))
+    return changes
+
+def html_text(html, selector=DEFAULT_SELECTOR):
+    """
+    Text of the first element matching `selector` with one block per line,
+    roughly what the browser's innerText gives. None if nothing matches.
+    """
+    root = parse_html(html).select_one(selector)
+    if root is None:
+        return None
+    for tag in root.find_all(['script', 'style', 'noscript']):
+        tag.decompose()
+    for tag in root.find_all(BLOCK_TAGS):
+        tag.insert_before('\n')
+        tag.insert_after('\n')
+    return root.get_text()
+
+async def fetch_text(url, selector=DEFAULT_SELECTOR, mode='auto', pool=None, timeout=60000):
+    """
+    Returns (text under `selector`, fetch path used), using the cheapest
+    path `mode` allows (see scrapers.fetch.fetch_page).
+    """
+    async def from_page(page):
+        found = await page.locator(selector).count()
+        return await page.locator(selector if found else 'body').first.inner_text()
+
+    text, path = await fetch_page(url, lambda html: (html_text(html, selector) or '').strip(), from_page, mode, pool,
+                                  timeout, ready=Readiness(selector, timeout=15000), what=f"'{selector}'")
+    if not text:
+        raise ValueError(f"no '{selector}' content in {url}")
+    return text, path
+
+def _item(label, url, kind, old, new):
+    # No 'permalink': every change shares the page URL, so near-duplicate
+    # detection must only compare the titles (see history_store.fingerprint)
+    lines = [f"- {snippet}" for snippet in old] + [f"+ {snippet}" for snippet in new]
+    headline = new[0] if new else old[0]
+    return {
+        'title': f"{label}: {kind} \"{headline[:80]}\"",
+        'url': url,
+        'date': datetime.now().strftime('%Y-%m-%d'),
+        'source': label,
+        'description': '\n'.join(lines)[:DESCRIPTION_CHARS]
+    }
+
+async def watch_page(url, label, site=None, pool=None, state=None):
+    """
+    Returns one item per run of added or changed blocks on `url` since the
+    last run (at most max_items). The first check only records a baseline.
+    Site options: selector, ignore (regexes), max_items, fetch_mode.
+    """
+    site = site or {}
+    state = state or get_state()
+    text, mode = await fetch_text(url, site.get('selector', DEFAULT_SELECTOR), get_mode(site), pool)
+    current = snapshot(split_blocks(text, site.get('ignore', ())), mode)
+    previous = state.get(url)
+
+    if previous is not None and previous['fingerprint'] == current['fingerprint']:
+        metrics.incr('page_watch.unchanged')
+        logging.info(f"{label}: no changes on {url}")
+        return []
+
+    state.update(url, current)
+    if previous is None or previous.get('mode') != mode:
+        # HTTP and browser text split blocks slightly differently, so a
+        # switch of fetch path starts a new baseline instead of a diff
+        logging.info(f"{label}: recorded baseline of {url} ({len(current['blocks'])} blocks)")
+        return []
+
+    changes = diff_blocks(previous, current)
+    max_items = site.get('max_items', DEFAULT_MAX_ITEMS)
+    if len(changes) > max_items:
+        logging.info(f"{label}: {len(changes)} changed sections on {url}, reporting the first {max_items}")
+    metrics.incr('page_watch.changed')
+    metrics.incr('page_watch.blocks_changed', sum(len(new) for _, _, new in changes))
+    return [_item(label, url, kind, old, new) for kind, old, new in changes[:max_items]]
+
+async def scrape_watch_page(name, site, pool=None):
+    """
+    Registry entry point for a `sites:` entry with `scraper: page_watch`.
+    """
+    return await watch_page(site['url'], site.get('source', name), site, pool)
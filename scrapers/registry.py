@@ -0,0 +1,191 @@
+import importlib
+import logging
+
+from scheduler import SourceJob
+
+FACEBOOK_KEYS = ('pages', 'groups', 'cookies_file', 'enabled', 'deadline', 'feed_enabled', 'feed_deadline',
+                 'scroll_count', 'feed_target', 'scroll_patience', 'scroll_jitter', 'scroll_timeout', 'debug')
+API_KEYS = ('api_endpoints', 'api_max_age_days') # fetch_mode 'api', see scrapers.netcapture
+WATCH_KEYS = ('selector', 'ignore', 'max_items', 'source') # see scrapers.page_watch
+
+class ScraperSpec:
+    """
+    Declares one scraper so main can schedule it straight from config.
+
+    - entry: "module:function", imported only when a source using it is enabled
+    - call: 'config' -> entry(config, pool=pool), 'url' -> entry(site['url']),
+      'site' -> entry(job name, site config), plus pool=pool when is_async;
+      with uses_history, is_known=SeenStore.is_known is passed too
+    - config_key: key under config['sites'] (default: name); legacy_key is an
+      old top-level location still honoured. Other site entries can opt in
+      with `scraper: <name>`, or implicitly by having the `claims_key` key.
+    - required / optional: site config schema, checked before scheduling
+    - fetch_modes: modes the scraper supports (see scrapers.fetch.FETCH_MODES)
+    - cost: rough relative runtime; expensive jobs are started first
+    - commit: "module:function" called once the run's report went out
+    """
+    def __init__(self, name, entry, label, is_async=False, call='config', config_key=None, legacy_key=None,
+                 enabled_key='enabled', deadline_key='deadline', required=('url',), optional=(),
+                 fetch_modes=('browser',), cost=1, uses_history=False, error_prefix=None,
+                 claims_key=None, commit=None):
+        self.name = name
+        self.entry = entry
+        self.label = label
+        self.is_async = is_async
+        self.call = call
+        self.config_key = config_key or name
+        self.legacy_key = legacy_key
+        self.enabled_key = enabled_key
+        self.deadline_key = deadline_key
+        self.required = tuple(required)
+        self.optional = tuple(optional)
+        self.fetch_modes = tuple(fetch_modes)
+        self.cost = cost
+        self.uses_history = uses_history
+        self.error_prefix = error_prefix
+        self.claims_key = claims_key
+        self.commit = commit
+
+    def load(self, entry=None):
+        module_name, _, function = (entry or self.entry).partition(':')
+        return getattr(importlib.import_module(module_name), function)
+
+    def validate(self, site):
+        """
+        Returns warnings about a site config entry (empty if fine).
+        """
+        problems = []
+        known = set(self.required) | set(self.optional) | {self.enabled_key, self.deadline_key, 'scraper', 'fetch_mode'}
+        unknown = sorted(set(site) - known)
+        if unknown:
+            problems.append(f"unknown keys ignored: {', '.join(unknown)}")
+        mode = site.get('fetch_mode')
+        if mode and mode not in self.fetch_modes:
+            problems.append(f"fetch_mode '{mode}' not supported (supports: {', '.join(self.fetch_modes)})")
+        return problems
+
+REGISTRY = {}
+_used = [] # specs that got a job this run, for commit_sources()
+
+def register(spec):
+    REGISTRY[spec.name] = spec
+    return spec
+
+# Report order follows registration order.
+register(ScraperSpec('ncu_club', 'scrapers.ncu_club:scrape_ncu_club_async', "NCU Club", is_async=True,
+                     fetch_modes=('http', 'browser', 'auto'), error_prefix="Error building NCU Club scraper"))
+register(ScraperSpec('ncu_finance', 'scrapers.ncu_finance:scrape_ncu_finance_async', "NCU Finance", is_async=True,
+                     fetch_modes=('http', 'browser', 'auto'), error_prefix="Error building NCU Finance scraper"))
+register(ScraperSpec('ncu_incu', 'scrapers.ncu_incu:scrape_ncu_incu_async', "NCU iNCU", is_async=True,
+                     optional=('scroll_count', 'scroll_timeout') + API_KEYS, fetch_modes=('browser', 'api'),
+                     cost=3, uses_history=True, error_prefix="Error building NCU iNCU scraper"))
+register(ScraperSpec('ncu_career', 'scrapers.ncu_career:scrape_ncu_career_async', "NCU Career", is_async=True,
+                     required=('url', 'urls'), optional=API_KEYS, fetch_modes=('browser', 'api'), cost=3,
+                     error_prefix="Error building NCU Career scraper"))
+register(ScraperSpec('google_site', 'scrapers.google_site:scrape_google_site_async', "Adaptive Learning", is_async=True,
+                     optional=WATCH_KEYS, fetch_modes=('http', 'browser', 'auto'),
+                     error_prefix="Error building Google Site scraper", commit='scrapers.page_watch:commit_state'))
+register(ScraperSpec('kocpc', 'scrapers.kocpc:scrape_kocpc', "KOCPC", call='url', legacy_key='kocpc',
+                     fetch_modes=('http',), error_prefix="Error building KOCPC scraper"))
+register(ScraperSpec('facebook', 'scrapers.facebook:scrape_facebook_page_async', "Facebook Groups/Pages", is_async=True,
+                     required=('pages',), optional=FACEBOOK_KEYS, cost=5, error_prefix="Error scraping Facebook Pages"))
+register(ScraperSpec('facebook_feed', 'scrapers.facebook:scrape_personal_feed_async', "Personal Feed", is_async=True,
+                     config_key='facebook', enabled_key='feed_enabled', deadline_key='feed_deadline', required=(), optional=FACEBOOK_KEYS,
+                     cost=10, uses_history=True, error_prefix="Error scraping Facebook Feed"))
+register(ScraperSpec('feed', 'scrapers.feeds:scrape_feed_source', "Feed", call='site', claims_key='feed',
+                     required=('feed',), optional=('url', 'max_items', 'source'),
+                     fetch_modes=('http',), commit='scrapers.feeds:commit_state'))
+register(ScraperSpec('page_watch', 'scrapers.page_watch:scrape_watch_page', "Page Watch", is_async=True, call='site',
+                     optional=WATCH_KEYS, fetch_modes=('http', 'browser', 'auto'), cost=2,
+                     commit='scrapers.page_watch:commit_state'))
+
+def find_sources(config):
+    """
+    Matches config entries to registered scrapers.
+    Returns [(spec, job name, site config)] for the enabled ones, in
+    registry order, and warns about site entries no scraper consumes.
+    """
+    sites = config.get('sites') or {}
+    claimed = set()
+    sources = []
+    for spec in REGISTRY.values():
+        entries = []
+        if spec.config_key in sites:
+            entries.append((spec.label, sites[spec.config_key]))
+            claimed.add(spec.config_key)
+        elif spec.legacy_key and spec.legacy_key in config:
+            # e.g. the old top-level `kocpc:` section
+            entries.append((spec.label, config[spec.legacy_key]))
+        for key, site in sites.items():
+            if not isinstance(site, dict) or key == spec.config_key or key in claimed:
+                continue
+            implicit = spec.claims_key and spec.claims_key in site and not site.get('scraper')
+            if site.get('scraper') == spec.name or implicit:
+                claimed.add(key)
+                if spec.call == 'config':
+                    # These scrapers read their own config section, so only one instance works
+                    logging.warning(f"Site '{key}': scraper '{spec.name}' only runs from sites.{spec.config_key}; ignored")
+                    continue
+                entries.append((key, site))
+
+        for name, site in entries:
+            if not isinstance(site, dict) or not site.get(spec.enabled_key, False):
+                continue
+            problems = spec.validate(site)
+            for problem in problems:
+                logging.warning(f"Source '{name}' ({spec.name}): {problem}")
+            if spec.required and not any(key in site for key in spec.required):
+                logging.error(f"Source '{name}' skipped: missing {' or '.join(spec.required)}")
+                continue
+            sources.append((spec, name, site))
+
+    for key, site in sites.items():
+        if key in claimed:
+            continue
+        if isinstance(site, dict) and site.get('scraper'):
+            logging.warning(f"Site '{key}' names unknown scraper '{site['scraper']}'; ignored")
+        else:
+            logging.warning(f"Site '{key}' has no scraper (add a `feed:` URL or set `scraper:` to one of {', '.join(REGISTRY)}); ignored")
+    return sources
+
+def make_job(spec, name, site, config, history=None):
+    """
+    Builds the SourceJob for one source. The scraper module is imported
+    inside the job, so import errors land in the error log like any other failure.
+    """
+    extra = {}
+    if spec.uses_history and history is not None:
+        extra['is_known'] = history.is_known
+
+    if spec not in _used:
+        _used.append(spec)
+
+    if spec.call == 'url':
+        def run(pool):
+            return spec.load()(site['url'])
+    elif spec.call == 'site' and spec.is_async:
+        async def run(pool):
+            return await spec.load()(name, site, pool=pool)
+    elif spec.call == 'site':
+        def run(pool):
+            return spec.load()(name, site)
+    elif spec.is_async:
+        async def run(pool):
+            return await spec.load()(config, pool=pool, **extra)
+    else:
+        def run(pool):
+            return spec.load()(config, pool=pool, **extra)
+
+    return SourceJob(name, run, spec.error_prefix, site.get(spec.deadline_key), is_async=spec.is_async, cost=spec.cost)
+
+def commit_sources():
+    """
+    Lets scrapers that keep incremental state (e.g. last seen feed entries)
+    persist it; called by main after the report was sent and history saved.
+    """
+    for spec in _used:
+        if spec.commit:
+            try:
+                spec.load(spec.commit)()
+            except Exception as e:
+                logging.error(f"Error saving {spec.name} scraper state: {e}")
@@ -0,0 +1,82 @@
+import logging
+
+import metrics
+
+# Size of a lazily loaded list: the number of elements matching `selector`,
+# or, with `attr`, the largest numeric value of that attribute (Facebook
+# unmounts old posts, but aria-posinset keeps counting up).
+MEASURE_JS = """
+([selector, attr]) => {
+    const els = document.querySelectorAll(selector);
+    if (!attr) return els.length;
+    let top = 0;
+    for (const el of els) top = Math.max(top, Number(el.getAttribute(attr)) || 0);
+    return top;
+}
+"""
+
+GROWN_JS = f"""
+([selector, attr, previous]) => ({MEASURE_JS})([selector, attr]) > previous
+"""
+
+DEFAULT_GROWTH_TIMEOUT = 8000 # ms to wait for new content after a scroll
+DEFAULT_PATIENCE = 2 # scrolls without new content before giving up
+
+class ScrollStopper:
+    """
+    Decides when infinite scrolling has loaded enough:
+    - `target` items were collected,
+    - `patience` scrolls in a row brought nothing new, or
+    - every new item of a scroll is already known (`is_known(item)`,
+      usually SeenStore.is_known), i.e. we reached last run's content.
+    Falls back to `max_scrolls`. Stop reasons go to the run metrics.
+    """
+    def __init__(self, name, max_scrolls, target=None, patience=DEFAULT_PATIENCE, is_known=None, initial=0):
+        self.name = name
+        self.max_scrolls = max_scrolls
+        self.target = target
+        self.patience = patience
+        self.is_known = is_known
+        self.scrolls = 0
+        self.stale = 0
+        self.total = initial # items already collected before the first scroll
+        self.reason = None
+
+    def update(self, new_items):
+        """
+        Call once per scroll with the items it added. Returns True to stop.
+        """
+        self.scrolls += 1
+        self.total += len(new_items)
+        if self.target and self.total >= self.target:
+            return self._stop('target')
+        if not new_items:
+            self.stale += 1
+            if self.stale >= self.patience:
+                return self._stop('no_growth')
+        else:
+            self.stale = 0
+            if self.is_known and all(self.is_known(item) for item in new_items):
+                return self._stop('known')
+        if self.scrolls >= self.max_scrolls:
+            return self._stop('max_scrolls')
+        return False
+
+    def _stop(self, reason):
+        self.reason = reason
+        logging.info(f"{self.name}: stopped scrolling after {self.scrolls}/{self.max_scrolls} ({reason}, {self.total} items)")
+        metrics.incr(f"scroll.stopped.{reason}")
+        metrics.incr("scroll.scrolls_saved", self.max_scrolls - self.scrolls)
+        return True
+
+async def wait_for_growth_async(page, selector, previous, attr=None, timeout=DEFAULT_GROWTH_TIMEOUT):
+    """
+    Waits until the list under `selector` grows past `previous` (see MEASURE_JS).
+    Returns the new size, or `previous` if nothing loaded within `timeout` ms.
+    """
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+    try:
+        await page.wait_for_function(GROWN_JS, arg=[selector, attr, previous], timeout=timeout)
+    except PlaywrightTimeoutError:
+        return previous
+    return await page.evaluate(MEASURE_JS, [selector, attr])
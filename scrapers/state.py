@@ -0,0 +1,52 @@
+import json
+import logging
+import os
+import threading
+
+class PendingState:
+    """
+    Small JSON file of per-URL scraper state (e.g. last seen feed entry,
+    page fingerprints). Updates stay pending until commit(), which main
+    calls through the registry once the run's report went out, so a failed
+    run reports the same changes again next time.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._data = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._data is None:
+            self._data = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        self._data = json.load(f)
+                except (OSError, ValueError) as e:
+                    logging.warning(f"Ignoring unreadable state file {self.path}: {e}")
+        return self._data
+
+    def get(self, key):
+        """
+        Last committed value for `key` (pending updates are not visible).
+        """
+        with self._lock:
+            return self._load().get(key)
+
+    def update(self, key, value):
+        with self._lock:
+            self._pending[key] = value
+
+    def commit(self):
+        with self._lock:
+            if not self._pending:
+                return
+            data = self._load()
+            data.update(self._pending)
+            self._pending = {}
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,59 @@
+import logging
+import time
+
+import metrics
+
+COUNT_JS = """
+([selector, minCount]) => document.querySelectorAll(selector).length >= minCount
+"""
+
+class Readiness:
+    """
+    What a scraper waits for after navigation, instead of a fixed sleep:
+    - selector / min_count: at least min_count elements match selector
+    - network_idle: no network activity for 500 ms
+    Whatever is declared is awaited in that order, all within `timeout` ms.
+    `legacy_delay` is the fixed sleep (seconds) this replaces; the
+    difference is recorded as time saved in the run metrics.
+    """
+    def __init__(self, selector=None, min_count=1, network_idle=False, timeout=10000, legacy_delay=0, name=None):
+        self.selector = selector
+        self.min_count = min_count
+        self.network_idle = network_idle
+        self.timeout = timeout
+        self.legacy_delay = legacy_delay
+        self.name = name or selector or 'page'
+
+def _remaining(readiness, start):
+    return max(1, readiness.timeout - (time.monotonic() - start) * 1000)
+
+def _record(readiness, start, ready):
+    elapsed = time.monotonic() - start
+    metrics.observe('waits.ready', elapsed)
+    if readiness.legacy_delay:
+        # Net saving: negative when the page was slower than the old sleep
+        metrics.observe('waits.saved', readiness.legacy_delay - elapsed)
+    if not ready:
+        metrics.incr('waits.timeouts')
+        logging.warning(f"Readiness wait for '{readiness.name}' timed out after {elapsed:.1f}s, continuing")
+    else:
+        logging.debug(f"'{readiness.name}' ready after {elapsed:.2f}s")
+    return ready
+
+async def wait_ready_async(page, readiness):
+    """
+    Waits until `readiness` is met or its timeout passes.
+    Returns True if the page became ready; never raises on timeout.
+    """
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+    start = time.monotonic()
+    ready = True
+    try:
+        if readiness.network_idle:
+            await page.wait_for_load_state('networkidle', timeout=_remaining(readiness, start))
+        if readiness.selector:
+            await page.wait_for_function(COUNT_JS, arg=[readiness.selector, readiness.min_count],
+                                         timeout=_remaining(readiness, start))
+    except PlaywrightTimeoutError:
+        ready = False
+    return _record(readiness, start, ready)
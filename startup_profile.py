@@ -0,0 +1,68 @@
+import os
+import re
+import subprocess
+import sys
+
+# "import time:       self [us] |  cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+def run_modules(config):
+    """
+    Modules a run with `config` imports beyond main itself: the entry
+    modules of enabled scrapers and, with AI enabled, the provider's SDK.
+    """
+    from scrapers.registry import find_sources
+    modules = []
+    for spec, _, _ in find_sources(config):
+        module = spec.entry.partition(':')[0]
+        if module not in modules:
+            modules.append(module)
+    if config.get('ai', {}).get('enabled', False):
+        from ai_providers import BACKENDS, provider_name
+        modules.append('ai_helper')
+        backend = BACKENDS.get(provider_name(config))
+        if backend is not None and backend.sdk_module:
+            modules.append(backend.sdk_module)
+    return modules
+
+def profile_imports(modules):
+    """
+    Imports `modules` in a fresh interpreter under -X importtime.
+    Returns [(module, self_us, cumulative_us, depth)] in import order and
+    the list of modules that failed to import.
+    """
+    code = "\n".join(
+        f"try:\n    import {module}\nexcept Exception as e:\n    print({module!r}, file=sys.stdout)"
+        for module in modules
+    )
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import sys\n{code}"],
+        capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows, result.stdout.split()
+
+def format_report(rows, failed=(), top=25):
+    lines = []
+    top_level = [row for row in rows if row[3] == 0]
+    total = sum(row[2] for row in top_level)
+    lines.append(f"Startup imports: {total / 1000:.1f} ms over {len(rows)} modules")
+    lines.append(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for module, self_us, cumulative_us, _ in sorted(rows, key=lambda row: row[2], reverse=True)[:top]:
+        lines.append(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>8.1f}  {module}")
+    for module in failed:
+        lines.append(f"(failed to import {module})")
+    return "\n".join(lines)
+
+def report(config, top=25):
+    """
+    Import-time report for main plus everything a run with `config` would load.
+    """
+    rows, failed = profile_imports(['main'] + run_modules(config))
+    return format_report(rows, failed, top)
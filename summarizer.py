@@ -1,10 +1,11 @@
 
-def summarize_and_format(grouped_data, errors=None):
+def summarize_and_format(grouped_data, errors=None, prefiltered=None):
     """
     Takes a dictionary of {source_name: {summary: str, items: [list]}}
+    and the (item, rule) pairs the local pre-filter dropped.
     Returns an HTML string.
     """
-    if not grouped_data and not errors:
+    if not grouped_data and not errors and not prefiltered:
         return "<p>No new items found.</p>"
 
     html = "<html><body style='font-family: Arial, sans-serif; color: #333; line-height: 1.5;'>"
@@ -69,6 +70,15 @@ def summarize_and_format(grouped_data, errors=None):
 
         html += "</ul>\n"
 
+    # Items the pre-filter dropped before the AI saw them
+    if prefiltered:
+        html += f"<h3 style='color: #7f8c8d; margin-top: 30px; margin-bottom: 15px;'>Pre-filtered ({len(prefiltered)})</h3>\n"
+        html += "<ul style='padding-left: 20px; color: #7f8c8d; margin-top: 10px;'>\n"
+        for item, rule in prefiltered:
+            link = item.get('link') or item.get('url') or '#'
+            html += f"<li style='margin-bottom: 8px;'><a href='{link}' style='text-decoration: none; color: #7f8c8d;'>{item.get('title', 'No Title')}</a> ({item.get('source', 'Unknown')}, {rule})</li>\n"
+        html += "</ul>\n"
+
     html += "<div style='margin-top: 40px; font-size: 0.8em; color: #bdc3c7;'>Generated by Info Tracker Bot</div>\n"
     html += "</body></html>"
     